@@ -26,10 +26,16 @@ from src.config import Config
 from src.logger import Logger, route_logger
 from src.project import ProjectManager
 from src.state import AgentState
+from src.token_usage import TokenUsage
 from src.agents import Agents
 from src.agents.iaedit import Iaedit
 from src.agents.hyperparametre import Hyperparametre
 from src.llm import LLM
+from src.llm.response_cache import response_cache
+from src.browser.http_client import http_client
+from src.browser.scrape_cache import get_scrape_cache
+from src.browser.search_cache import search_cache
+from src.bert.models import model_registry
 
 
 app = Flask(__name__)
@@ -46,6 +52,7 @@ os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 manager = ProjectManager()
 AgentState = AgentState()
+token_usage_ledger = TokenUsage()
 config = Config()
 logger = Logger()
 project_dir = config.get_projects_dir()
@@ -174,6 +181,7 @@ def handle_message(data):
     selected_files = data.get("selected_files")
 
     agent = Agents(base_model=base_model, search_engine=search_engine)
+    token_usage_ledger.start_run(project_name)
 
     if action == "continue":
         new_message = manager.new_message("")
@@ -272,7 +280,18 @@ def get_agent_state():
     data = request.json
     project_name = data.get("project_name")
     agent_state = AgentState.get_latest_state(project_name)
-    return jsonify({"state": agent_state})
+    version = AgentState.get_state_version(project_name)
+    return jsonify({"state": agent_state, "version": version})
+
+
+@app.route("/api/get-agent-state-delta", methods=["POST"])
+@route_logger(logger)
+def get_agent_state_delta():
+    data = request.json
+    project_name = data.get("project_name")
+    since_version = data.get("since_version") or 0
+    version, entries = AgentState.get_state_delta(project_name, since_version)
+    return jsonify({"project": project_name, "version": version, "entries": entries})
 
 
 @app.route("/api/get-project-files/", methods=["GET"])
@@ -337,10 +356,70 @@ def calculate_tokens():
 @route_logger(logger)
 def token_usage():
     project_name = request.args.get("project_name")
-    token_count = AgentState.get_latest_token_usage(project_name)
+    token_count = token_usage_ledger.get_total(project_name)
     return jsonify({"token_usage": token_count})
 
 
+@app.route("/api/token-usage-report", methods=["GET"])
+@route_logger(logger)
+def token_usage_report():
+    project_name = request.args.get("project_name")
+    run_id = request.args.get("run_id")
+    report = token_usage_ledger.get_agent_report(project_name, run_id)
+    return jsonify({"usage": token_usage_ledger.get_counter(project_name), "agents": report})
+
+
+@app.route("/api/llm-cache", methods=["GET"])
+@route_logger(logger)
+def llm_cache_stats():
+    return jsonify(response_cache.stats())
+
+
+@app.route("/api/http-stats", methods=["GET"])
+@route_logger(logger)
+def http_stats():
+    return jsonify({"hosts": http_client.get_stats()})
+
+
+@app.route("/api/llm-cache", methods=["DELETE"])
+@route_logger(logger)
+def llm_cache_clear():
+    response_cache.clear()
+    return jsonify({"message": "LLM response cache cleared"})
+
+
+@app.route("/api/scrape-cache", methods=["GET"])
+@route_logger(logger)
+def scrape_cache_stats():
+    return jsonify(get_scrape_cache().stats())
+
+
+@app.route("/api/scrape-cache", methods=["DELETE"])
+@route_logger(logger)
+def scrape_cache_clear():
+    get_scrape_cache().clear()
+    return jsonify({"message": "Scrape cache cleared"})
+
+
+@app.route("/api/search-cache", methods=["GET"])
+@route_logger(logger)
+def search_cache_stats():
+    return jsonify(search_cache.stats())
+
+
+@app.route("/api/search-cache", methods=["DELETE"])
+@route_logger(logger)
+def search_cache_clear():
+    search_cache.clear()
+    return jsonify({"message": "Search cache cleared"})
+
+
+@app.route("/api/models", methods=["GET"])
+@route_logger(logger)
+def loaded_models():
+    return jsonify(model_registry.stats())
+
+
 @app.route("/api/logs", methods=["GET"])
 def real_time_logs():
     log_file = logger.read_log_file()
@@ -0,0 +1,123 @@
+"""
+Micro-benchmark: embedding backends for `[EMBEDDINGS] MODEL`.
+
+Each backend of `src.bert.models.EMBEDDING_BACKENDS` is loaded in a fresh
+process, so resident memory isn't shared between them. Reports load time,
+RSS after loading and after encoding, single-sentence latency (what a
+knowledge base query pays), batch throughput (what a rebuild pays) and the
+cosine similarity of every vector to the torch one.
+
+Run from the repository root (the ONNX backends need `optimum[onnxruntime]`):
+
+    python benchmarks/embeddings.py --sentences 2000
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = ("flask route database model react component state hook api token cache index query "
+         "python function class error test deploy docker server client request response").split()
+
+
+def make_sentences(count: int):
+    rng = np.random.default_rng(0)
+    return [" ".join(rng.choice(WORDS, size=rng.integers(6, 40))) for _ in range(count)]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def worker(backend: str, sentences: int, latency_runs: int, output: str):
+    from src.bert.models import model_registry
+
+    texts = make_sentences(sentences)
+    start = time.perf_counter()
+    model = model_registry.get_sentence_transformer(backend=backend)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    model.encode(texts[:8])  # warm-up
+    latencies = []
+    for text in texts[:latency_runs]:
+        start = time.perf_counter()
+        model.encode([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    vectors = model.encode(texts, batch_size=64)
+    batch_seconds = time.perf_counter() - start
+    np.save(output, np.asarray(vectors, dtype="float32"))
+
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "rss_loaded_mb": rss_loaded,
+        "rss_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "latency_ms": statistics.median(latencies),
+        "sentences_per_second": len(texts) / batch_seconds,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,torch-int8,onnx,onnx-int8")
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--latency-runs", type=int, default=200)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.sentences, args.latency_runs, args.output)
+        return
+
+    backends = args.backends.split(",")
+    if "torch" in backends:
+        backends.remove("torch")
+    backends.insert(0, "torch")
+
+    print("| Backend | Load | RSS loaded | RSS peak | ms / sentence | sentences / s | cosine to torch (min / mean) |")
+    print("| --- | --- | --- | --- | --- | --- | --- |")
+    with tempfile.TemporaryDirectory() as directory:
+        reference = None
+        for backend in backends:
+            output = os.path.join(directory, f"{backend}.npy")
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", backend, "--output", output,
+                 "--sentences", str(args.sentences), "--latency-runs", str(args.latency_runs)],
+                cwd=ROOT, capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                print(f"| {backend} | failed: {result.stderr.strip().splitlines()[-1]} | | | | | |")
+                continue
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+
+            vectors = np.load(output)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            if backend == "torch":
+                reference = vectors
+            if reference is not None:
+                similarity = np.sum(vectors * reference, axis=1)
+                agreement = f"{similarity.min():.4f} / {similarity.mean():.4f}"
+            else:
+                agreement = "-"
+
+            print(f"| {backend} | {stats['load_seconds']:.1f} s | {stats['rss_loaded_mb']:.0f} MB "
+                  f"| {stats['rss_peak_mb']:.0f} MB | {stats['latency_ms']:.2f} | {stats['sentences_per_second']:.0f} "
+                  f"| {agreement} |", flush=True)
+
+
+if __name__ == "__main__":
+    main()
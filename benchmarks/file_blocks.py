@@ -0,0 +1,116 @@
+"""
+Micro-benchmark: parsing large multi-file coder responses.
+
+"before" is the old `validate_response` shared by the coder, patcher and
+feature agents: it waits for the whole reply, then splits it. "after" is
+`FileBlockParser` fed with the response in small chunks, as
+`LLM.stream_inference` delivers it.
+
+Besides CPU time, it reports when the first file becomes available, in
+generated characters and in seconds at `--chars-per-second` (the provider's
+output rate): the old parser can only start once the last character is in.
+
+Run from the repository root:
+
+    python benchmarks/file_blocks.py --files 40 --lines 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.filesystem.file_blocks import FileBlockParser  # noqa: E402
+
+
+def old_validate_response(response: str):
+    response = response.strip()
+    if response.startswith("~~~"):
+        response = response.replace("~~~", "", 1)
+    if response.endswith("~~~"):
+        response = response[::-1].replace("~~~"[::-1], "", 1)[::-1]
+    response = response.strip()
+
+    result = []
+    current_file = None
+    current_code = []
+    for line in response.split("\n"):
+        if line.startswith("File:"):
+            if current_file and current_code:
+                result.append({"file": os.path.normpath(current_file), "code": "\n".join(current_code)})
+            if "`" in line:
+                current_file = line.split("`")[1].strip()
+            elif line.endswith(":"):
+                current_file = line.split(":")[1].strip()
+            else:
+                return False
+            current_code = []
+        elif line.startswith("```"):
+            continue
+        else:
+            current_code.append(line)
+    if current_file and current_code:
+        result.append({"file": os.path.normpath(current_file), "code": "\n".join(current_code)})
+    return result
+
+
+def make_response(files: int, lines: int) -> str:
+    blocks = []
+    for i in range(files):
+        code = "\n".join(f"    value_{j} = compute({i}, {j})  # line {j}" for j in range(lines))
+        blocks.append(f"File: `src/module_{i}/file_{i}.py`:\n```python\ndef main_{i}():\n{code}\n```\n")
+    return "~~~\n" + "\n".join(blocks) + "~~~"
+
+
+def chunked(response: str, size: int):
+    return [response[i:i + size] for i in range(0, len(response), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=16, help="characters per streamed chunk")
+    parser.add_argument("--chars-per-second", type=float, default=400.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    response = make_response(args.files, args.lines)
+    chunks = chunked(response, args.chunk_size)
+    print(f"{args.files} files, {len(response)} characters, {len(chunks)} chunks")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        before = old_validate_response(response)
+    before_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        stream = FileBlockParser()
+        for chunk in chunks:
+            stream.feed(chunk)
+        after = stream.close()
+    after_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+    first_file_at = None
+    received = 0
+    stream = FileBlockParser()
+    for chunk in chunks:
+        received += len(chunk)
+        if stream.feed(chunk) and first_file_at is None:
+            first_file_at = received
+    stream.close()
+
+    assert len(before) == len(after) == args.files
+    assert all(a["code"] == b["code"].rstrip("\n") for a, b in zip(after, before))
+
+    rate = args.chars_per_second
+    print(f"before: parse {before_ms:.2f} ms, first file after {len(response)} chars "
+          f"({len(response) / rate:.1f} s)")
+    print(f"after:  parse {after_ms:.2f} ms, first file after {first_file_at} chars "
+          f"({first_file_at / rate:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
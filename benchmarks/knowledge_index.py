@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: recall and latency of the knowledge base index layouts.
+
+Builds every layout of `src.memory.vector_index` over synthetic, clustered,
+normalized embeddings (MiniLM has 384 dimensions) and searches them one query
+at a time, like `KnowledgeBase.search`. Recall@k is measured against an exact
+inner-product search. NPROBE, HNSW_M, EF_SEARCH and PQ_M come from
+`[KNOWLEDGE_BASE]` in config.toml.
+
+Run from the repository root:
+
+    python benchmarks/knowledge_index.py --sizes 10000,100000
+    python benchmarks/knowledge_index.py --sizes 1000000 --modes flat,ivf,ivf+pq
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.memory.vector_index import build_index, normalize  # noqa: E402
+
+MODES = ["flat", "flat+pq", "ivf", "ivf+pq", "hnsw"]
+
+
+def make_corpus(size: int, dim: int, queries: int, seed: int = 0):
+    # Topics as cluster centres, entries scattered around them
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(size // 100, 10), dim), dtype="float32")
+    vectors = np.empty((size, dim), dtype="float32")
+    for start in range(0, size, 100000):
+        end = min(start + 100000, size)
+        topics = rng.integers(len(centres), size=end - start)
+        vectors[start:end] = centres[topics] + 0.6 * rng.standard_normal((end - start, dim), dtype="float32")
+    topics = rng.integers(len(centres), size=queries)
+    query_vectors = centres[topics] + 0.6 * rng.standard_normal((queries, dim), dtype="float32")
+    # In place: a million 384-d vectors are 1.5 GB
+    faiss.normalize_L2(vectors)
+    return vectors, normalize(query_vectors)
+
+
+def run(size: int, dim: int, queries: int, k: int, modes: list):
+    vectors, query_vectors = make_corpus(size, dim, queries)
+    ids = np.arange(size, dtype="int64")
+
+    # Exact answers, without copying the corpus into another index
+    _, truth = faiss.knn(query_vectors, vectors, k, metric=faiss.METRIC_INNER_PRODUCT)
+
+    rows = []
+    for mode in modes:
+        start = time.perf_counter()
+        index = build_index(mode, dim, ids, vectors)
+        build_seconds = time.perf_counter() - start
+
+        found = np.empty((queries, k), dtype="int64")
+        start = time.perf_counter()
+        for i in range(queries):
+            _, found[i:i + 1] = index.search(query_vectors[i:i + 1], k)
+        latency_ms = (time.perf_counter() - start) * 1000 / queries
+
+        recall = np.mean([len(set(found[i]) & set(truth[i])) / k for i in range(queries)])
+        # Through a file: serializing a large index in memory would double it
+        with tempfile.TemporaryDirectory() as directory:
+            faiss.write_index(index, os.path.join(directory, "index.faiss"))
+            size_mb = os.path.getsize(os.path.join(directory, "index.faiss")) / 1024 / 1024
+        rows.append((mode, build_seconds, latency_ms, recall, size_mb))
+        del index
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(1)
+    print(f"| Entries | Layout | Build | ms / query | Recall@{args.k} | Index size |")
+    print("| --- | --- | --- | --- | --- | --- |")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        for mode, build_seconds, latency_ms, recall, size_mb in run(size, args.dim, args.queries, args.k,
+                                                                    args.modes.split(",")):
+            print(f"| {size:,} | {mode} | {build_seconds:.1f} s | {latency_ms:.3f} | {recall:.3f} | {size_mb:.0f} MB |",
+                  flush=True)
+
+
+if __name__ == "__main__":
+    main()
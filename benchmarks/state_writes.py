@@ -0,0 +1,78 @@
+"""
+Micro-benchmark: cost of one agent state write.
+
+"before" mirrors the old behaviour where every `AgentState()` built its own
+engine with default pragmas and ran `create_all`, as `Runner.update_state`
+does twice per terminal chunk. "after" goes through the shared engine from
+`src.database.get_engine`.
+
+Run from the repository root:
+
+    python benchmarks/state_writes.py --writes 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine  # noqa: E402
+
+import src.state  # noqa: E402
+from src.database import dispose_engines, get_engine  # noqa: E402
+from src.state import AgentState  # noqa: E402
+
+# The benchmark measures storage, not Socket.IO
+src.state.emit_agent = lambda *args, **kwargs: True
+
+
+def fresh_engine_state(sqlite_path: str) -> AgentState:
+    agent_state = AgentState.__new__(AgentState)
+    agent_state.engine = create_engine(f"sqlite:///{sqlite_path}")
+    SQLModel.metadata.create_all(agent_state.engine)
+    # Every write goes to SQLite, not to the write-behind cache
+    agent_state.cache = None
+    return agent_state
+
+
+def shared_engine_state(sqlite_path: str) -> AgentState:
+    agent_state = AgentState.__new__(AgentState)
+    agent_state.engine = get_engine(sqlite_path)
+    # Every write goes to SQLite, not to the write-behind cache
+    agent_state.cache = None
+    return agent_state
+
+
+def run(make_state, sqlite_path: str, writes: int) -> float:
+    start = time.perf_counter()
+    for i in range(writes):
+        # Two constructions per write, like Runner.update_state
+        new_state = make_state(sqlite_path).new_state()
+        new_state["terminal_session"]["output"] = f"chunk {i}"
+        make_state(sqlite_path).add_to_current_state("bench", new_state)
+    return (time.perf_counter() - start) / writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_db = os.path.join(tmp, "before.db")
+        after_db = os.path.join(tmp, "after.db")
+
+        before = run(fresh_engine_state, before_db, args.writes)
+        after = run(shared_engine_state, after_db, args.writes)
+        dispose_engines()
+
+    print(f"writes per run       : {args.writes}")
+    print(f"before (engine/write): {before * 1000:.3f} ms/write")
+    print(f"after  (shared, WAL) : {after * 1000:.3f} ms/write")
+    print(f"speedup              : {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
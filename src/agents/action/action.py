@@ -12,7 +12,7 @@ class Action:
         config = Config()
         self.project_dir = config.get_projects_dir()
         
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="action")
 
     def render(
         self, conversation: list
@@ -39,15 +39,15 @@ class Action:
         else:
             return response["response"], response["action"]
 
-    def execute(self, conversation: list, project_name: str) -> tuple[str, str]:
+    def execute(self, conversation: list, project_name: str, retry: bool = False) -> tuple[str, str]:
         prompt = self.render(conversation)
-        response = self.llm.inference(prompt, project_name)
+        response = self.llm.inference(prompt, project_name, retry=retry)
         
         valid_response = self.validate_response(response)
         
         while not valid_response:
             print("Invalid response from the model, trying again...")
-            return self.execute(conversation, project_name)
+            return self.execute(conversation, project_name, retry=True)
         
         print("===" * 10)
         # print(valid_response)
@@ -27,22 +27,25 @@ from src.project import ProjectManager
 from src.state import AgentState
 from src.logger import Logger
 
-from src.bert.sentence import SentenceBert
+from src.bert.sentence import extract_keywords_batch
 from src.memory import KnowledgeBase
-from src.browser.search import BingSearch, GoogleSearch, DuckDuckGoSearch
+from src.browser.search import get_search_engine
+from src.browser.research import run_research
 from src.browser import Browser
 from src.browser import start_interaction
-from src.filesystem import ReadCode
+from src.filesystem.dependencies import build_dependency_graph, dependency_levels
 from src.services import Netlify, Git
 from src.documenter.pdf import PDF
 from src.config import Config
 from src.memory.rag import scrape_website
+from src.memory.code_index import code_context
 import json
 import time
 import platform
 
 import tiktoken
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 from src.socket_instance import emit_agent
 
@@ -108,7 +111,9 @@ class Agents:
             search_results = {}
             return search_results
 
-        self.update_contextual_keywords(focus)
+        # Planner steps come as {step: text}
+        steps = plans.values() if isinstance(plans, dict) else plans
+        self.update_contextual_keywords(focus, *steps)
         print("\ncontext_keywords :: ", self.collected_context_keywords, "\n")
 
         context_keywords_html = "<mark>Context Keywords:</mark> "
@@ -143,57 +148,36 @@ class Agents:
 
         return search_results
 
+    def search_web(self, queries: list, project_name: str) -> dict:
+        """Search, scrape and format all queries concurrently, see `run_research`."""
+        self.logger.info(f"\nSearch Engine :: {self.engine}")
+
+        def on_link(number: int, query: str, link: str):
+            print("\nLink :: ", link, "\n")
+            linkadress = "<b>Link" + str(number) + ":" + link
+            self.project_manager.add_message_from_devika(project_name, linkadress)
+
+        return run_research(
+            queries,
+            self.engine,
+            lambda: get_search_engine(self.engine),
+            self.scrape_website,
+            lambda data, query: self.formatter.execute(data, query, project_name),
+            on_link
+        )
+
     def search_queries(self, queries: list, project_name: str, wsearch: bool = False,
                        searchFaiss: bool = False) -> dict:
         results = {}
 
         if wsearch and not searchFaiss:
             # Web search only
-            if self.engine == "bing":
-                web_search = BingSearch()
-            elif self.engine == "google":
-                web_search = GoogleSearch()
-            else:
-                web_search = DuckDuckGoSearch()
-
-            self.logger.info(f"\nSearch Engine :: {self.engine}")
-            i = 1
-            for query in queries:
-                query = query.strip().lower()
-
-                web_search.search(query)
-                link = web_search.get_first_link()
-                if link:
-                    print("\nLink :: ", link, "\n")
-                    linkadress = "<b>Link" + str(i) + ":" + link
-                    self.project_manager.add_message_from_devika(project_name, linkadress)
-                    i += 1
-                if not link:
-                    continue
-                data = self.scrape_website(link)
-
-                if query in results:
-                    results[query] += self.formatter.execute(data, query, project_name)
-                    self.logger.info(f"got the search results for : {query}")
-                else:
-                    results[query] = self.formatter.execute(data, query, project_name)
-                    self.logger.info(f"got the search results for : {query}")
-
-            return results
+            return self.search_web(queries, project_name)
 
         elif wsearch and searchFaiss:
             # Web search and Faiss
             knowledge_base = KnowledgeBase()
 
-            if self.engine == "bing":
-                web_search = BingSearch()
-            elif self.engine == "google":
-                web_search = GoogleSearch()
-            else:
-                web_search = DuckDuckGoSearch()
-
-            self.logger.info(f"\nSearch Engine :: {self.engine}")
-            i = 1
             for query in queries:
                 query = query.strip().lower()
 
@@ -201,32 +185,14 @@ class Agents:
                 if knowledge:
                     if query in results:
                         results[query] += self.formatter.execute(knowledge, query, project_name)
-                        self.logger.info(f"got the search results for : {query}")
-                        knowledge_base.add_knowledge(query, results[query])
                     else:
                         results[query] = self.formatter.execute(knowledge, query, project_name)
-                        self.logger.info(f"got the search results for : {query}")
-                        knowledge_base.add_knowledge(query, results[query])
+                    self.logger.info(f"got the search results for : {query}")
 
-                web_search.search(query)
-                link = web_search.get_first_link()
-                if link:
-                    print("\nLink :: ", link, "\n")
-                    linkadress = "<b>Link" + str(i) + ":" + link
-                    self.project_manager.add_message_from_devika(project_name, linkadress)
-                    i += 1
-                if not link:
-                    continue
-                data = self.scrape_website(link)
+            for query, text in self.search_web(queries, project_name).items():
+                results[query] = results[query] + text if query in results else text
 
-                if query in results:
-                    results[query] += self.formatter.execute(data, query, project_name)
-                    self.logger.info(f"got the search results for : {query}")
-                    knowledge_base.add_knowledge(query, results[query])
-                else:
-                    results[query] = self.formatter.execute(data, query, project_name)
-                    self.logger.info(f"got the search results for : {query}")
-                    knowledge_base.add_knowledge(query, results[query])
+            knowledge_base.add_knowledge_many(list(results.items()))
 
             return results
 
@@ -252,13 +218,15 @@ class Agents:
 
         return results
 
-    def update_contextual_keywords(self, sentence: str):
+    def update_contextual_keywords(self, *sentences: str):
         """
-        Update the context keywords with the latest sentence/prompt
+        Update the context keywords with the latest sentences (focus and plan
+        steps), extracted together in one KeyBERT batch
         """
-        keywords = SentenceBert(sentence).extract_keywords()
-        for keyword in keywords:
-            self.collected_context_keywords.append(keyword[0])
+        for keywords in extract_keywords_batch(list(sentences)):
+            for keyword, _ in keywords:
+                if keyword not in self.collected_context_keywords:
+                    self.collected_context_keywords.append(keyword)
 
         return self.collected_context_keywords
 
@@ -285,7 +253,7 @@ class Agents:
         # print("Auto Commit :: ", self.project_manager.get_auto_commit(project_name))
         if self.project_manager.get_auto_commit(project_name):
             conversation = self.project_manager.get_all_messages_formatted(project_name)
-            code_markdown = ReadCode(project_name).code_set_to_markdown()
+            code_markdown = code_context(project_name, prompt)
             print("\n Committing the code\n")
             project_path = self.project_manager.get_project_path(project_name)
             if self.git == None:
@@ -328,7 +296,7 @@ class Agents:
 
         # print("Auto Commit :: ", self.project_manager.get_auto_commit(project_name))
         if self.project_manager.get_auto_commit(project_name):
-            code_markdown = ReadCode(project_name).code_set_to_markdown()
+            code_markdown = code_context(project_name, prompt)
             print("\n Committing the code\n")
             project_path = self.project_manager.get_project_path(project_name)
             if self.git == None:
@@ -359,7 +327,7 @@ class Agents:
 
         # print("Auto Commit :: ", self.project_manager.get_auto_commit(project_name))
         if self.project_manager.get_auto_commit(project_name):
-            code_markdown = ReadCode(project_name).code_set_to_markdown()
+            code_markdown = code_context(project_name, prompt)
             print("\n Committing the code\n")
             project_path = self.project_manager.get_project_path(project_name)
             if self.git == None:
@@ -433,7 +401,7 @@ class Agents:
 
         # print("Auto Commit :: ", self.project_manager.get_auto_commit(project_name))
         if self.project_manager.get_auto_commit(project_name):
-            code_markdown = ReadCode(project_name).code_set_to_markdown()
+            code_markdown = code_context(project_name, prompt)
             print("\n Committing the code\n")
             project_path = self.project_manager.get_project_path(project_name)
             if self.git == None:
@@ -508,7 +476,7 @@ class Agents:
         self.agent_state.set_agent_active(project_name, True)
 
         conversation = self.project_manager.get_all_messages_formatted(project_name)
-        code_markdown = ReadCode(project_name).code_set_to_markdown()
+        code_markdown = code_context(project_name, prompt)
 
         response, action = self.action.execute(conversation, project_name)
         responsecore = "<b>Agent Core: </b><br>" + response
@@ -683,6 +651,83 @@ class Agents:
 
         self.agent_state.set_agent_completed(project_name, True)
 
+    def read_dependencies(self, file_name: str, graph: dict, project_name: str) -> list:
+        """Already generated files `file_name` depends on, within `[CODEGEN] DEPENDENCY_CONTEXT_CHARS`."""
+        project_path = self.coder.get_project_path(project_name)
+        budget = Config().get_codegen_dependency_context_chars()
+        dependencies = []
+        for dependency in sorted(graph.get(file_name, ())):
+            if budget <= 0:
+                break
+            for candidate in (dependency.replace("\\", "/"), dependency):
+                path = os.path.join(project_path, os.path.normpath(candidate))
+                if os.path.isfile(path):
+                    with open(path, "r", encoding="utf-8", errors="replace") as f:
+                        code = f.read(budget)
+                    dependencies.append({"file": dependency, "code": code})
+                    budget -= len(code)
+                    break
+        return dependencies
+
+    def generate_code_files(self, levels: list, graph: dict, plans, search_results: dict, project_name: str,
+                            filenames: list, os_system: str):
+        """
+        Run the coder for every file of the system design, one dependency level
+        at a time (see `src.filesystem.dependencies`) so each file is written
+        with the files it depends on in its prompt. Within a level files are
+        generated on a worker pool sized by `[CODEGEN]` for the current
+        provider. Files are saved as soon as they are generated, while the
+        editor and agent state are updated in order. Files that failed are
+        reported once all are done.
+        """
+        ask_user_prompt = "Be Professional."
+        provider = self.coder.llm.model_enum_mapping.get(self.base_model)
+        workers = Config().get_codegen_workers(provider)
+        failed = {}
+
+        def generate(file_name: str, show: bool):
+            return self.coder.execute(step_by_step_plan=plans, user_context=ask_user_prompt,
+                                      search_results=search_results, project_name=project_name,
+                                      file_name=file_name, filenames=filenames, system_os=os_system,
+                                      save=True, show=show,
+                                      dependencies=self.read_dependencies(file_name, graph, project_name))
+
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="coder") if workers > 1 else None
+        try:
+            for level in levels:
+                if pool is None:
+                    for file_name in level:
+                        print(f"\nGenerating {file_name}\n")
+                        try:
+                            code = generate(file_name, show=True)
+                            print("\ncode :: ", code, "\n")
+                        except Exception as e:
+                            print(f"An error occurred while processing {file_name}: {e}")
+                            failed[file_name] = str(e)
+                    continue
+
+                self.logger.info(f"Generating {len(level)} files with {workers} workers")
+                futures = [pool.submit(generate, file_name, False) for file_name in level]
+                # Waiting in submission order keeps the progress in order
+                for file_name, future in zip(level, futures):
+                    try:
+                        code = future.result()
+                        print("\ncode :: ", code, "\n")
+                        self.coder.emulate_code_writing(code, project_name)
+                    except Exception as e:
+                        print(f"An error occurred while processing {file_name}: {e}")
+                        failed[file_name] = str(e)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if failed:
+            report = "<b>Some files could not be generated:</b><br>" + "<br>".join(
+                f"<u>{file_name}</u>: {error}" for file_name, error in failed.items()
+            )
+            self.project_manager.add_message_from_devika(project_name, report)
+        return failed
+
     def execute(self, prompt: str, project_name_from_user: str = None, wsearch: bool = False,
                 searchFaiss: bool = False):
         """
@@ -765,49 +810,36 @@ class Agents:
         print("                                                                                            ")
         print(filenames)
 
-        # Process each filename found in systemdesign.txt
+        # Process each filename found in systemdesign.txt, assets only get an empty placeholder
+        code_files = []
         for file_name in filenames:
-            try:
-                formatted_name_path = os.path.normpath(file_name)
-                ext = Path(file_name).suffix.lower()
-                if '.' not in file_name:
-                    continue
-                if ext in ['.jpg', '.png', '.jpeg', '.gif', '.bmp', '.tiff', '.placeholder', '.ico', '.md', '.json']:
-                    path_for_file = os.path.join(self.project_dir, project_name, formatted_name_path)
-                    formatted_forfile = os.path.normpath(path_for_file)
-                    # Check if the file exists; if not, create an empty file
-                    if not os.path.isfile(formatted_forfile):
-                        # Ensure the directory exists
-                        os.makedirs(os.path.dirname(formatted_forfile), exist_ok=True)
-
-                        # Create an empty file
-                        with open(formatted_forfile, 'w') as f:
-                            pass
-                        continue
-                    else:
-                        continue
-
-                print("                                                                                            ")
-                print("                                                                                            ")
-                print("                                                                                            ")
-                print(formatted_name_path)
-                print("                                                                                            ")
-                print("                                                                                            ")
-                print("                                                                                            ")
-                ask_user_prompt = "Be Professional."
-                # Execute the coder logic for each file
-                code = self.coder.execute(step_by_step_plan=plans, user_context=ask_user_prompt,
-                                          search_results=search_results, project_name=project_name,
-                                          file_name=formatted_name_path, filenames=filenames, system_os=os_system)
-                print("\ncode :: ", code, "\n")
-                # time.sleep(4)
-                # Save the generated code to the project
-                self.coder.save_code_to_project(code, project_name)
+            formatted_name_path = os.path.normpath(file_name)
+            ext = Path(file_name).suffix.lower()
+            if '.' not in file_name:
                 continue
-            except Exception as e:
-                # Handle any exceptions that occur during execution
-                print(f"An error occurred while processing {file_name}: {e}")
-                continue  # Continue with the next file
+            if ext in ['.jpg', '.png', '.jpeg', '.gif', '.bmp', '.tiff', '.placeholder', '.ico', '.md', '.json']:
+                path_for_file = os.path.join(self.project_dir, project_name, formatted_name_path)
+                formatted_forfile = os.path.normpath(path_for_file)
+                # Check if the file exists; if not, create an empty file
+                if not os.path.isfile(formatted_forfile):
+                    # Ensure the directory exists
+                    os.makedirs(os.path.dirname(formatted_forfile), exist_ok=True)
+
+                    # Create an empty file
+                    with open(formatted_forfile, 'w') as f:
+                        pass
+                continue
+            code_files.append(formatted_name_path)
+
+        # Plan the generation order: files are written after the files they depend on
+        graph = build_dependency_graph(code_files, self.coder.get_project_path(project_name))
+        levels = dependency_levels(graph)
+        generation_plan = "<mark>Generation order:</mark><br>" + "<br>".join(
+            f"<b>Level {i}</b>: " + ", ".join(level) for i, level in enumerate(levels, start=1)
+        )
+        self.project_manager.add_message_from_devika(project_name, generation_plan)
+
+        self.generate_code_files(levels, graph, plans, search_results, project_name, filenames, os_system)
         self.agent_state.get_project_files1(project_name)
         # End of file processing loop
         # self.codereviewfile.executeofcoder(prompt=prompt, project_name=project_name)
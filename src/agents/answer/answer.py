@@ -12,7 +12,7 @@ class Answer:
         config = Config()
         self.project_dir = config.get_projects_dir()
         
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="answer")
 
     def render(
         self, conversation: list, code_markdown: str
@@ -41,14 +41,14 @@ class Answer:
         #else:
         #    return response["response"]
 
-    def execute(self, conversation: list, code_markdown: str, project_name: str) -> str:
+    def execute(self, conversation: list, code_markdown: str, project_name: str, retry: bool = False) -> str:
         prompt = self.render(conversation, code_markdown)
-        response = self.llm.inference(prompt, project_name)
+        response = self.llm.inference(prompt, project_name, retry=retry)
         
         valid_response = self.validate_response(response)
         
         while not valid_response:
             print("Invalid response from the model, trying again...")
-            return self.execute(conversation, code_markdown, project_name)
+            return self.execute(conversation, code_markdown, project_name, retry=True)
 
         return valid_response
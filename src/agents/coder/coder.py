@@ -11,6 +11,8 @@ from src.state import AgentState
 from src.logger import Logger
 from src.socket_instance import emit_agent
 from src.utils import shorten_path
+from src.filesystem.file_blocks import parse_file_blocks, stream_file_blocks
+from src.memory.code_index import code_index
 
 PROMPT = open("src/agents/coder/prompt.jinja2", "r").read().strip()
 
@@ -20,11 +22,12 @@ class Coder:
         config = Config()
         self.project_dir = config.get_projects_dir()
         self.logger = Logger()
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="coder")
         self.project_manager = ProjectManager()
 
     def render(
-            self, step_by_step_plan: str | dict, user_context: str, search_results: dict, file_name: str, filenames: list, system_os: str
+            self, step_by_step_plan: str | dict, user_context: str, search_results: dict, file_name: str, filenames: list, system_os: str,
+            dependencies: list = None
     ) -> str:
         env = Environment(loader=BaseLoader())
         template = env.from_string(PROMPT)
@@ -34,50 +37,12 @@ class Coder:
             search_results=search_results,
             file_name=file_name,
             filenames=filenames,
-            system_os=system_os
+            system_os=system_os,
+            dependencies=dependencies
         )
 
     def validate_response(self, response: str) -> Union[List[Dict[str, str]], bool]:
-        response = response.strip()
-
-        # Replace '~~~' at the beginning and end of the response
-        if response.startswith("~~~"):
-            response = response.replace("~~~", "", 1)
-        if response.endswith("~~~"):
-            response = response[::-1].replace("~~~"[::-1], "", 1)[::-1]
-
-        response = response.strip()
-
-        #if "~~~" in response:
-         #   return False
-
-        result = []
-        current_file = None
-        current_code = []
-        code_block = False
-
-        for line in response.split("\n"):
-            if line.startswith("File:"):
-                if current_file and current_code:
-                    result.append({"file": os.path.normpath(current_file), "code": "\n".join(current_code)})
-                if "`" in line:
-                    current_file = line.split("`")[1].strip()
-                elif line.startswith("File:") and line.endswith(":") and "`" not in line:
-                    current_file = line.split(":")[1].strip()
-                else:
-                    print("Error: Line does not contain a backtick (`).")
-                    return False
-                current_code = []
-                code_block = False
-            elif line.startswith("```"):
-                code_block = not code_block
-            else:
-                current_code.append(line)
-
-        if current_file and current_code:
-            result.append({"file": os.path.normpath(current_file), "code": "\n".join(current_code)})
-
-        return result
+        return parse_file_blocks(response)
 
     def save_code_to_project(self, response: List[Dict[str, str]], project_name: str):
         project_name = project_name.lower().replace(" ", "-")
@@ -102,6 +67,8 @@ class Coder:
             with open(file_path2, "w+", encoding="utf-8") as f:
                 f.write(file["code"])
 
+        code_index.update_files(project_name, [file["file"] for file in response])
+
         return os.path.join(project_dir, project_name)
 
     def get_project_path(self, project_name: str):
@@ -144,20 +111,36 @@ class Coder:
             project_name: str,
             file_name: str,
             filenames: list,
-            system_os: str
+            system_os: str,
+            save: bool = False,
+            show: bool = True,
+            dependencies: list = None,
+            retry: bool = False
     ) -> list[dict[str, str]] | bool:
-
-        prompt = self.render(step_by_step_plan, user_context, search_results, file_name, filenames, system_os)
-        response = self.llm.inference(prompt, project_name)
-
-        valid_response = self.validate_response(response)
+        """
+        Generate code for `file_name`. Each file is shown (and with `save`,
+        written to the project) as soon as its block is complete in the
+        streamed response. Callers running several coders at once pass
+        `show=False` and call `emulate_code_writing` themselves, in order.
+        `dependencies` are already written files ({"file", "code"}) that
+        `file_name` builds on.
+        """
+
+        def on_file(file: dict):
+            if show:
+                self.emulate_code_writing([file], project_name)
+            if save:
+                self.save_code_to_project([file], project_name)
+
+        prompt = self.render(step_by_step_plan, user_context, search_results, file_name, filenames, system_os,
+                             dependencies)
+        valid_response = stream_file_blocks(self.llm, prompt, project_name, on_file, retry)
 
         while not valid_response:
             print("Invalid response from coder the model, trying again...")
-            return self.execute(step_by_step_plan, user_context, search_results, project_name, file_name, filenames, system_os)
+            return self.execute(step_by_step_plan, user_context, search_results, project_name, file_name, filenames,
+                                system_os, save, show, dependencies, retry=True)
 
         print(valid_response)
 
-        self.emulate_code_writing(valid_response, project_name)
-
         return valid_response
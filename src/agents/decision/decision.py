@@ -8,7 +8,7 @@ PROMPT = open("src/agents/decision/prompt.jinja2").read().strip()
 
 class Decision:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="decision")
 
     def render(self, prompt: str) -> str:
         env = Environment(loader=BaseLoader())
@@ -32,14 +32,14 @@ class Decision:
         
         return response
 
-    def execute(self, prompt: str, project_name: str) -> str:
+    def execute(self, prompt: str, project_name: str, retry: bool = False) -> str:
         rendered_prompt = self.render(prompt)
-        response = self.llm.inference(rendered_prompt, project_name)
+        response = self.llm.inference(rendered_prompt, project_name, retry=retry)
         
         valid_response = self.validate_response(response)
         
         while not valid_response:
             print("Invalid response from the model, trying again...")
-            return self.execute(prompt, project_name)
+            return self.execute(prompt, project_name, retry=True)
 
         return valid_response
\ No newline at end of file
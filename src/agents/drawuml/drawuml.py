@@ -16,7 +16,7 @@ PROMPT = open("src/agents/drawuml/prompt.jinja2").read().strip()
 class Drawuml:
     def __init__(self, base_model: str):
         self.project_manager = ProjectManager()
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="drawuml")
         config = Config()
         self.project_dir = config.get_projects_dir()
 
@@ -9,8 +9,9 @@ from jinja2 import Environment, BaseLoader
 from src.agents.internal_monologue import InternalMonologue
 from src.agents.planner import Planner
 from src.agents.researcher import Researcher
-from src.bert.sentence import SentenceBert
-from src.browser.search import BingSearch, GoogleSearch, DuckDuckGoSearch
+from src.bert.sentence import extract_keywords_batch
+from src.browser.search import get_search_engine
+from src.browser.research import run_research
 from src.config import Config
 from src.llm import LLM
 from src.memory import KnowledgeBase
@@ -22,6 +23,8 @@ from src.logger import Logger
 from src.agents.formatter import Formatter
 from src.agents.prq import Prq
 from src.memory.rag import scrape_website
+from src.filesystem.file_blocks import parse_file_blocks, stream_file_blocks
+from src.memory.code_index import code_index
 
 PROMPT = open("src/agents/feature/prompt.jinja2", "r").read().strip()
 
@@ -31,7 +34,7 @@ class Feature:
         config = Config()
         self.project_dir = config.get_projects_dir()
         self.shorten_path = shorten_path("")
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="feature")
         self.project_manager = ProjectManager()
         self.prq = Prq(base_model=base_model)
         self.planner = Planner(base_model=base_model)
@@ -73,46 +76,7 @@ class Feature:
         )
 
     def validate_response(self, response: str) -> Union[List[Dict[str, str]], bool]:
-        response = response.strip()
-
-        # Replace '~~~' at the beginning and end of the response
-        if response.startswith("~~~"):
-            response = response.replace("~~~", "", 1)
-        if response.endswith("~~~"):
-            response = response[::-1].replace("~~~"[::-1], "", 1)[::-1]
-
-        response = response.strip()
-
-        #if "~~~" in response:
-         #   return False
-
-        result = []
-        current_file = None
-        current_code = []
-        code_block = False
-
-        for line in response.split("\n"):
-            if line.startswith("File:"):
-                if current_file and current_code:
-                    result.append({"file": os.path.normpath(current_file), "code": "\n".join(current_code)})
-                if "`" in line:
-                    current_file = line.split("`")[1].strip()
-                elif line.startswith("File:") and line.endswith(":") and "`" not in line:
-                    current_file = line.split(":")[1].strip()
-                else:
-                    print("Error: Line does not contain a backtick (`).")
-                    return False
-                current_code = []
-                code_block = False
-            elif line.startswith("```"):
-                code_block = not code_block
-            else:
-                current_code.append(line)
-
-        if current_file and current_code:
-            result.append({"file": os.path.normpath(current_file), "code": "\n".join(current_code)})
-
-        return result
+        return parse_file_blocks(response)
 
     def save_code_to_project(self, response: List[Dict[str, str]], project_name: str):
         project_name = project_name.lower().replace(" ", "-")
@@ -138,6 +102,8 @@ class Feature:
             with open(file_path2, "w+", encoding="utf-8") as f:
                 f.write(file["code"])
 
+        code_index.update_files(project_name, [file["file"] for file in response])
+
         return os.path.join(project_dir, project_name)
 
     def get_project_path(self, project_name: str):
@@ -178,22 +144,25 @@ class Feature:
             systemdesign: list[str],
             summarydiff: str,
             project_name: str,
-            system_os: str
+            system_os: str,
+            save: bool = False,
+            retry: bool = False
     ) -> list[dict[str, str]] | bool:
         # this has to have other agent "search_results, plans"
 
+        def on_file(file: dict):
+            self.emulate_code_writing([file], project_name)
+            if save:
+                self.save_code_to_project([file], project_name)
+
         # summary_code = self.reviewer.execute(code_markdown,project_name)
         prompt = self.render(file_code, file_name, gitdiff, plans, systemdesign, summarydiff, system_os)
-        response = self.llm.inference(prompt, project_name)
-
-        valid_response = self.validate_response(response)
+        valid_response = stream_file_blocks(self.llm, prompt, project_name, on_file, retry)
 
         while not valid_response:
             print("Invalid response from the model feauture, trying again...")
             return self.execute(file_code, file_name, gitdiff, plans, systemdesign, summarydiff, project_name,
-                                system_os)
-
-        self.emulate_code_writing(valid_response, project_name)
+                                system_os, save, retry=True)
 
         return valid_response
 
@@ -222,59 +191,22 @@ class Feature:
         return results
 
     def search_queries(self, queries: list, project_name: str) -> dict:
-
-        results = {}
-
-        knowledge_base = KnowledgeBase()
-
-        if self.engine == "bing":
-            web_search = BingSearch()
-        elif self.engine == "google":
-            web_search = GoogleSearch()
-        else:
-            web_search = DuckDuckGoSearch()
-
+        """Search, scrape and format all queries concurrently, see `run_research`."""
         self.logger.info(f"\nSearch Engine :: {self.engine}")
-        i = 1
-        for query in queries:
-            query = query.strip().lower()
 
-            # knowledge = knowledge_base.get_knowledge(query)
-            # if knowledge:
-            #   if query in results:
-            #       # If the same query is encountered again, combine the results
-            #       results[query] += self.formatter.execute(knowledge,query, project_name)
-            #       self.logger.info(f"got the search results for : {query}")
-            #       knowledge_base.add_knowledge(query, results[query])
-            #    else:
-            #        results[query] = self.formatter.execute(knowledge,query, project_name)
-            #       self.logger.info(f"got the search results for : {query}")
-            #       knowledge_base.add_knowledge(query, results[query])
-
-            web_search.search(query)
-            link = web_search.get_first_link()
-            if link:
-                print("\nLink :: ", link, "\n")
-                linkadress = "<b>Link" + str(i) + ":" + link
-                self.project_manager.add_message_from_devika(project_name, linkadress)
-                i += 1
-            if not link:
-                continue
-            data = self.scrape_website(link)
-
-            if query in results:
-                # If the same query is encountered again, combine the results
-                results[query] += self.formatter.execute(data,query, project_name)
-                self.logger.info(f"got the search results for : {query}")
-                # knowledge_base.add_knowledge(query, results[query])
-            else:
-                results[query] = self.formatter.execute(data,query, project_name)
-                self.logger.info(f"got the search results for : {query}")
-                # knowledge_base.add_knowledge(query, results[query])
-
-            # self.logger.info(f"got the search results for : {query}")
-            # knowledge_base.add_knowledge(query, results[query])
-        return results
+        def on_link(number: int, query: str, link: str):
+            print("\nLink :: ", link, "\n")
+            linkadress = "<b>Link" + str(number) + ":" + link
+            self.project_manager.add_message_from_devika(project_name, linkadress)
+
+        return run_research(
+            queries,
+            self.engine,
+            lambda: get_search_engine(self.engine),
+            self.scrape_website,
+            lambda data, query: self.formatter.execute(data, query, project_name),
+            on_link
+        )
 
     def execute4memory(self, conversation: list, project_name_from_user: str = None) -> tuple:
         """
@@ -312,7 +244,7 @@ class Feature:
         )
         # self.project_manager.add_message_from_devika(project_name, f"In summary: {summary}")
 
-        self.update_contextual_keywords(focus)
+        self.update_contextual_keywords(focus, *plans.values())
         print("\ncontext_keywords :: ", self.collected_context_keywords, "\n")
         context_keywords_html = "<mark>Context Keywords:</mark> "
         for keyword in self.collected_context_keywords:
@@ -391,7 +323,7 @@ class Feature:
         )
         # self.project_manager.add_message_from_devika(project_name, f"In summary: {summary}")
 
-        self.update_contextual_keywords(focus)
+        self.update_contextual_keywords(focus, *plans.values())
         print("\ncontext_keywords :: ", self.collected_context_keywords, "\n")
         context_keywords_html = "<mark>Context Keywords:</mark> "
         for keyword in self.collected_context_keywords:
@@ -434,12 +366,14 @@ class Feature:
 
         return search_results, plans
 
-    def update_contextual_keywords(self, sentence: str):
+    def update_contextual_keywords(self, *sentences: str):
         """
-        Update the context keywords with the latest sentence/prompt
+        Update the context keywords with the latest sentences (focus and plan
+        steps), extracted together in one KeyBERT batch
         """
-        keywords = SentenceBert(sentence).extract_keywords()
-        for keyword in keywords:
-            self.collected_context_keywords.append(keyword[0])
+        for keywords in extract_keywords_batch(list(sentences)):
+            for keyword, _ in keywords:
+                if keyword not in self.collected_context_keywords:
+                    self.collected_context_keywords.append(keyword)
 
         return self.collected_context_keywords
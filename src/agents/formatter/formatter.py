@@ -7,7 +7,7 @@ PROMPT = open("src/agents/formatter/prompt.jinja2").read().strip()
 
 class Formatter:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="formatter")
 
     def render(self, code_snippet: str, query:str) -> str:
         env = Environment(loader=BaseLoader())
@@ -34,11 +34,11 @@ class Formatter:
         # Return True if the response passes all validation checks
         return response
 
-    def execute(self, code_snippet: str,query:str, project_name: str) -> str:
+    def execute(self, code_snippet: str,query:str, project_name: str, retry: bool = False) -> str:
         code_prompt = self.render(code_snippet,query)
-        response = self.llm.inference(code_prompt, project_name)
+        response = self.llm.inference(code_prompt, project_name, retry=retry)
         validate_response = self.validate_response(response)
         while not validate_response:
             print("Invalid response from formatter the model, trying again...")
-            return self.execute(code_snippet,query, project_name)
+            return self.execute(code_snippet,query, project_name, retry=True)
         return validate_response
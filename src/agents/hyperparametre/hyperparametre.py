@@ -9,7 +9,7 @@ PROMPT = open("src/agents/hyperparametre/prompt.jinja2").read().strip()
 
 class Hyperparametre:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="hyperparametre")
 
     def render(self, temperature: float, max_token: float, top_p: float) -> str:
         env = Environment(loader=BaseLoader())
@@ -24,14 +24,15 @@ class Hyperparametre:
 
         return response
 
-    def execute(self, temperature: float, max_token: float, top_p: float, project_name: str) -> str:
+    def execute(self, temperature: float, max_token: float, top_p: float, project_name: str,
+                retry: bool = False) -> str:
         rendered_prompt = self.render(temperature, max_token, top_p)
-        response = self.llm.inference(rendered_prompt, project_name)
+        response = self.llm.inference(rendered_prompt, project_name, retry=retry)
 
         valid_response = self.validate_response(response)
 
         while not valid_response:
             print("Invalid response from the model hyperparametre, trying again...")
-            return self.execute(temperature, max_token, top_p, project_name)
+            return self.execute(temperature, max_token, top_p, project_name, retry=True)
 
         return valid_response
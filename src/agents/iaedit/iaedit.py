@@ -14,7 +14,7 @@ class Iaedit:
         config = Config()
         self.project_dir = config.get_projects_dir()
 
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="iaedit")
 
     def render(
             self, prompt: str, code: str
@@ -81,20 +81,20 @@ class Iaedit:
             return False
 
         return suggestions
-    def rectify_code_function(self, prompt: str, code: str, project_name: str) -> str:
+    def rectify_code_function(self, prompt: str, code: str, project_name: str, retry: bool = False) -> str:
         prompt1 = self.render(prompt, code)
-        response = self.llm.inference(prompt1, project_name)
+        response = self.llm.inference(prompt1, project_name, retry=retry)
         valid_response = self.validate_response(response)
 
         while not valid_response:
             print("Invalid response from the model iaedit, trying again...")
-            return self.rectify_code_function(prompt, code, project_name)
+            return self.rectify_code_function(prompt, code, project_name, retry=True)
 
         return valid_response
 
-    def autocompletion(self, language: str, code: str, project_name: str) -> list[str]:
+    def autocompletion(self, language: str, code: str, project_name: str, retry: bool = False) -> list[str]:
         prompt1 = self.render1(language, code)
-        response = self.llm.inference(prompt1, project_name)
+        response = self.llm.inference(prompt1, project_name, retry=retry)
         valid_response = self.validate_response1(response)
         print("valide response from autopilot")
         print("                                ")
@@ -106,18 +106,18 @@ class Iaedit:
         print("                                ")
         while not valid_response:
             print("Invalid response from the model iaedit, trying again...")
-            return self.autocompletion(language, code, project_name)
+            return self.autocompletion(language, code, project_name, retry=True)
 
         return valid_response
 
-    def execute(self, conversation: list, code_markdown: str, project_name: str) -> str:
+    def execute(self, conversation: list, code_markdown: str, project_name: str, retry: bool = False) -> str:
         prompt = self.render(conversation, code_markdown)
-        response = self.llm.inference(prompt, project_name)
+        response = self.llm.inference(prompt, project_name, retry=retry)
 
         valid_response = self.validate_response(response)
 
         while not valid_response:
             print("Invalid response from the model, trying again...")
-            return self.execute(conversation, code_markdown, project_name)
+            return self.execute(conversation, code_markdown, project_name, retry=True)
 
         return valid_response
@@ -16,7 +16,7 @@ PROMPT = open("src/agents/incdev/prompt.jinja2").read().strip()
 
 class Incdev:
     def __init__(self, base_model: str, search_engine: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="incdev")
         config = Config()
         self.readsysdesign = read_Sysdesign
         self.project_manager = ProjectManager()
@@ -228,9 +228,8 @@ class Incdev:
                         if '.' not in file_name or ext in ['.jpg', '.png', '.jpeg', '.gif','.tiff', '.bmp', '.placeholder', '.ico', '.md', '.json']:
                             continue
                         code = self.feature.execute(file_code, file_name, gitdiff, plans, filenames2,
-                                                    summary, project_name, system_os)
+                                                    summary, project_name, system_os, save=True)
                         print("\nfeature code :: ", code, "\n")
-                        self.feature.save_code_to_project(code, project_name)
                     else:
                         # If score is not 10, the loop will continue with the same file_name
                         print(f"Score for {file_name} is {score}, retrying...")
@@ -309,9 +308,8 @@ class Incdev:
                         if '.' not in file_name or ext in ['.jpg', '.png', '.jpeg', '.gif', '.bmp','.tiff', '.placeholder', '.ico', '.md', '.json']:
                             continue
                         code = self.feature.execute(file_code, file_name, gitdiff, plans, filenames,
-                                                    summary, project_name, system_os)
+                                                    summary, project_name, system_os, save=True)
                         print("\nfeature code :: ", code, "\n")
-                        self.feature.save_code_to_project(code, project_name)
                     else:
                         # If score is not 10, the loop will continue with the same file_name
                         print(f"Score for {file_name} is {score}, retrying...")
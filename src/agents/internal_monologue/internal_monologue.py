@@ -8,7 +8,7 @@ PROMPT = open("src/agents/internal_monologue/prompt.jinja2").read().strip()
 
 class InternalMonologue:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="internal_monologue")
 
     def render(self, current_prompt: str) -> str:
         env = Environment(loader=BaseLoader())
@@ -33,15 +33,15 @@ class InternalMonologue:
         else:
             return response["internal_monologue"]
 
-    def execute(self, current_prompt: str, project_name: str) -> str:
+    def execute(self, current_prompt: str, project_name: str, retry: bool = False) -> str:
         rendered_prompt = self.render(current_prompt)
-        response = self.llm.inference(rendered_prompt, project_name)
+        response = self.llm.inference(rendered_prompt, project_name, retry=retry)
         
         valid_response = self.validate_response(response)
         
         while not valid_response:
             print("Invalid response from the model, trying again...")
-            return self.execute(current_prompt, project_name)
+            return self.execute(current_prompt, project_name, retry=True)
 
         return valid_response
 
@@ -10,6 +10,8 @@ from src.config import Config
 from src.llm import LLM
 from src.state import AgentState
 from src.utils import shorten_path
+from src.filesystem.file_blocks import parse_file_blocks, stream_file_blocks
+from src.memory.code_index import code_index
 
 PROMPT = open("src/agents/patcher/prompt.jinja2", "r").read().strip()
 PROMPT1 = open("src/agents/patcher/prompt1.jinja2", "r").read().strip()
@@ -19,7 +21,7 @@ class Patcher:
         config = Config()
         self.project_dir = config.get_projects_dir()
         self.shorten_path = shorten_path("")
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="patcher")
         self.project_manager = ProjectManager()
 
     def render(
@@ -62,46 +64,7 @@ class Patcher:
         )
 
     def validate_response(self, response: str) -> Union[List[Dict[str, str]], bool]:
-        response = response.strip()
-
-        # Replace '~~~' at the beginning and end of the response
-        if response.startswith("~~~"):
-            response = response.replace("~~~", "", 1)
-        if response.endswith("~~~"):
-            response = response[::-1].replace("~~~"[::-1], "", 1)[::-1]
-
-        response = response.strip()
-
-        #if "~~~" in response:
-         #   return False
-
-        result = []
-        current_file = None
-        current_code = []
-        code_block = False
-
-        for line in response.split("\n"):
-            if line.startswith("File:"):
-                if current_file and current_code:
-                    result.append({"file": os.path.normpath(current_file), "code": "\n".join(current_code)})
-                if "`" in line:
-                    current_file = line.split("`")[1].strip()
-                elif line.startswith("File:") and line.endswith(":") and "`" not in line:
-                    current_file = line.split(":")[1].strip()
-                else:
-                    print("Error: Line does not contain a backtick (`).")
-                    return False
-                current_code = []
-                code_block = False
-            elif line.startswith("```"):
-                code_block = not code_block
-            else:
-                current_code.append(line)
-
-        if current_file and current_code:
-            result.append({"file": os.path.normpath(current_file), "code": "\n".join(current_code)})
-
-        return result
+        return parse_file_blocks(response)
 
     def save_code_to_project(self, response: List[Dict[str, str]], project_name: str):
         project_name = project_name.lower().replace(" ", "-")
@@ -126,6 +89,8 @@ class Patcher:
             with open(file_path2, "w+", encoding="utf-8") as f:
                 f.write(file["code"])
 
+        code_index.update_files(project_name, [file["file"] for file in response])
+
         return os.path.join(project_dir, project_name)
 
     def get_project_path(self, project_name: str):
@@ -158,26 +123,29 @@ class Patcher:
             "from": "patcher"
         })
 
+    def write_file(self, file: Dict[str, str], project_name: str, save: bool = False):
+        """Show a file as soon as the streamed response completes it, and optionally save it."""
+        self.emulate_code_writing([file], project_name)
+        if save:
+            self.save_code_to_project([file], project_name)
+
     def executefromreview(
             self,
             conversation: list,
             filename: str,
             file_code: str,
             reason: str,
-            project_name: str
+            project_name: str,
+            retry: bool = False
     ) -> Union[List[Dict[str, str]], bool]:
 
         prompt = self.renderfromreview(conversation, filename, file_code, reason, project_name)
-        response = self.llm.inference(prompt, project_name)
-
-        valid_response = self.validate_response(response)
+        valid_response = stream_file_blocks(self.llm, prompt, project_name,
+                                            lambda file: self.write_file(file, project_name, save=True), retry)
 
         while not valid_response:
             print("Invalid response from patcher model, trying again...")
-            return self.executefromreview(conversation, filename, file_code, reason, project_name)
-
-        self.emulate_code_writing(valid_response, project_name)
-        self.save_code_to_project(valid_response, project_name)
+            return self.executefromreview(conversation, filename, file_code, reason, project_name, retry=True)
 
         return valid_response
 
@@ -187,33 +155,29 @@ class Patcher:
             filename: str,
             file_code: str,
             reason: str,
-            project_name: str
+            project_name: str,
+            retry: bool = False
     ) -> Union[List[Dict[str, str]], bool]:
 
         prompt2 = self.renderfromreview1(prompt, filename, file_code, reason, project_name)
-        response = self.llm.inference(prompt2, project_name)
-
-        valid_response = self.validate_response(response)
+        valid_response = stream_file_blocks(self.llm, prompt2, project_name,
+                                            lambda file: self.write_file(file, project_name), retry)
 
         while not valid_response:
             print("Invalid response from patcher model, trying again...")
-            return self.executefromreview1(prompt, filename, file_code, reason, project_name)
-
-        self.emulate_code_writing(valid_response, project_name)
+            return self.executefromreview1(prompt, filename, file_code, reason, project_name, retry=True)
 
         return valid_response
 
     def execute(self, conversation: List, code_markdown: str, commands: List, error: str, system_os: str,
-                project_name: str) -> Union[List[Dict[str, str]], bool]:
+                project_name: str, save: bool = False, retry: bool = False) -> Union[List[Dict[str, str]], bool]:
         prompt = self.render(conversation, code_markdown, commands, error, system_os)
-        response = self.llm.inference(prompt, project_name)
-
-        valid_response = self.validate_response(response)
+        valid_response = stream_file_blocks(self.llm, prompt, project_name,
+                                            lambda file: self.write_file(file, project_name, save), retry)
 
         while not valid_response:
             print("Invalid response from the model, trying again...")
-            return self.execute(conversation, code_markdown, commands, error, system_os, project_name)
-
-        self.emulate_code_writing(valid_response, project_name)
+            return self.execute(conversation, code_markdown, commands, error, system_os, project_name, save,
+                                retry=True)
 
         return valid_response
@@ -11,7 +11,7 @@ PROMPT1 = open("src/agents/planner/promptselectedfiles.jinja2").read().strip()
 
 class Planner:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="planner")
         self.sysdesign = Sysdesigner(base_model=base_model)
         self.readsysdesign = read_Sysdesign
         config = Config()
@@ -101,25 +101,26 @@ class Planner:
 
         return result
 
-    def execute(self, prompt: str, productrq: str, project_name: str) -> str:
+    def execute(self, prompt: str, productrq: str, project_name: str, retry: bool = False) -> str:
         design = self.sysdesign.execute(prompt, productrq, project_name)
         prompt2 = self.render(prompt, productrq, design)
-        response = self.llm.inference(prompt2, project_name)
+        response = self.llm.inference(prompt2, project_name, retry=retry)
         validate_response = self.validate_response(response)
 
         while not validate_response:
             print("Invalid response from planner the model, trying again...")
-            return self.execute(prompt, productrq, project_name)
+            return self.execute(prompt, productrq, project_name, retry=True)
         return validate_response
 
-    def execute1(self, prompt: str, productrq: str, selectedfiles: list[str], project_name: str) -> str:
+    def execute1(self, prompt: str, productrq: str, selectedfiles: list[str], project_name: str,
+                 retry: bool = False) -> str:
         #design = self.readsysdesign(self.project_dir, project_name)
         design = self.sysdesign.execute(prompt, productrq, project_name)
         prompt2 = self.render1(prompt, productrq, design, selectedfiles)
-        response = self.llm.inference(prompt2, project_name)
+        response = self.llm.inference(prompt2, project_name, retry=retry)
         validate_response = self.validate_response(response)
 
         while not validate_response:
             print("Invalid response from planner the model, trying again...")
-            return self.execute1(prompt, productrq,selectedfiles, project_name)
+            return self.execute1(prompt, productrq,selectedfiles, project_name, retry=True)
         return validate_response
@@ -10,7 +10,7 @@ PROMPT1 = open("src/agents/prq/prompt4selectedfiles.jinja2").read().strip()
 
 class Prq:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="prq")
         config = Config()
         self.project_dir = config.get_projects_dir()
         self.readsysdesign = read_Sysdesign
@@ -45,22 +45,22 @@ class Prq:
         # Return True if the response passes all validation checks
         return response
 
-    def execute(self, prompt: str, project_name: str) -> str:
+    def execute(self, prompt: str, project_name: str, retry: bool = False) -> str:
         readsysdesign1 = self.readsysdesign(self.project_dir, project_name)
         prompt1 = self.render(prompt, readsysdesign1)
-        response = self.llm.inference(prompt1, project_name)
+        response = self.llm.inference(prompt1, project_name, retry=retry)
         validate_response = self.validate_response(response)
         while not validate_response:
             print("Invalid response from formatter the model, trying again...")
-            return self.execute(prompt, project_name)
+            return self.execute(prompt, project_name, retry=True)
         return validate_response
 
-    def execute1(self, prompt: str, selectedfiles: list[str], project_name: str) -> str:
+    def execute1(self, prompt: str, selectedfiles: list[str], project_name: str, retry: bool = False) -> str:
         readsysdesign1 = self.readsysdesign(self.project_dir, project_name)
         prompt1 = self.render1(prompt, selectedfiles, readsysdesign1)
-        response = self.llm.inference(prompt1, project_name)
+        response = self.llm.inference(prompt1, project_name, retry=retry)
         validate_response = self.validate_response(response)
         while not validate_response:
             print("Invalid response from formatter the model, trying again...")
-            return self.execute1(prompt, selectedfiles, project_name)
+            return self.execute1(prompt, selectedfiles, project_name, retry=True)
         return validate_response
@@ -8,7 +8,7 @@ PROMPT = open("src/agents/reporter/prompt.jinja2").read().strip()
 
 class Reporter:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="reporter")
 
     def render(self, conversation: list, code_markdown: str) -> str:
         env = Environment(loader=BaseLoader())
@@ -29,16 +29,17 @@ class Reporter:
     def execute(self,
         conversation: list,
         code_markdown: str,
-        project_name: str
+        project_name: str,
+        retry: bool = False
     ) -> str:
         prompt = self.render(conversation, code_markdown)
-        response = self.llm.inference(prompt, project_name)
+        response = self.llm.inference(prompt, project_name, retry=retry)
         
         valid_response = self.validate_response(response)
         
         while not valid_response:
             print("Invalid response from the model reporter, trying again...")
-            return self.execute(conversation, code_markdown, project_name)
+            return self.execute(conversation, code_markdown, project_name, retry=True)
 
         return valid_response
 
@@ -11,7 +11,7 @@ logger = Logger()
 class Researcher(AgentTemplate):
     def __init__(self, base_model: str):
         self.bing_search = BingSearch()
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="researcher")
 
         super().__init__()
 
@@ -25,7 +25,7 @@ class Researcher(AgentTemplate):
         return response
 
     def execute(
-        self, step_by_step_plan: str, contextual_keywords: List[str], project_name: str
+        self, step_by_step_plan: str, contextual_keywords: List[str], project_name: str, retry: bool = False
     ) -> dict | bool:
         contextual_keywords_str = ", ".join(
             map(lambda k: k.capitalize(), contextual_keywords)
@@ -35,7 +35,7 @@ class Researcher(AgentTemplate):
             contextual_keywords=contextual_keywords_str,
         )
 
-        response = self.llm.inference(prompt, project_name)
+        response = self.llm.inference(prompt, project_name, retry=retry)
 
         # Parse the response using REGEX
         parsed_response = self.parse_answer(response)
@@ -49,6 +49,6 @@ class Researcher(AgentTemplate):
 
         while not valid_response:
             print("Invalid response from the model, trying again...")
-            return self.execute(step_by_step_plan, contextual_keywords, project_name)
+            return self.execute(step_by_step_plan, contextual_keywords, project_name, retry=True)
 
         return valid_response
@@ -11,6 +11,7 @@ from src.utils import shorten_path
 from src.agents.patcher import Patcher
 from src.agents.planner import Planner
 from src.project import ProjectManager
+from src.memory.code_index import code_index
 
 PROMPT = open("src/agents/reviewer/prompt.jinja2").read().strip()
 PROMPT1 = open("src/agents/reviewer/prompt1.jinja2").read().strip()
@@ -18,7 +19,7 @@ PROMPT1 = open("src/agents/reviewer/prompt1.jinja2").read().strip()
 
 class Codereviewfile:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="codereviewfile")
         config = Config()
         self.project_dir = config.get_projects_dir()
         self.shorten_path = shorten_path("")
@@ -142,6 +143,8 @@ class Codereviewfile:
             with open(file_path2, "w+", encoding="utf-8") as f:
                 f.write(file["code"])
 
+        code_index.update_files(project_name, [file["file"] for file in response])
+
         return os.path.join(project_dir, project_name)
 
     def execute(self, conversation: list, project_name: str):
@@ -0,0 +1,264 @@
+import os
+import platform
+import selectors
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+
+from src.logger import Logger
+
+is_windows = platform.system() == 'Windows'
+
+if not is_windows:
+    import pty
+    import signal
+
+READ_SIZE = 4096
+READS_PER_WAKEUP = 16
+# How often the loop wakes up without I/O to flush throttled subscribers and reap exited processes
+TICK_INTERVAL = 0.1
+# Exited processes kept so `get` and `list` can still report their return code
+FINISHED_KEPT = 100
+
+
+class ManagedProcess:
+    """A command started by the supervisor, with the subscribers receiving its output."""
+
+    def __init__(self, process: subprocess.Popen, command: str, cwd: str, project_name: str = None,
+                 master: int = None):
+        self.process = process
+        self.pid = process.pid
+        self.command = command
+        self.cwd = cwd
+        self.project_name = project_name
+        self.master = master
+        self.started_at = time.time()
+        self.returncode = None
+        self.subscribers = []
+        self.exit_callbacks = []
+        # Output read before anyone subscribed, replayed to the first subscribers
+        self.backlog = []
+        self.finished = threading.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "pid": self.pid,
+            "command": self.command,
+            "project": self.project_name,
+            "running": not self.finished.is_set(),
+            "returncode": self.returncode,
+            "started_at": self.started_at
+        }
+
+    def wait(self, timeout: float = None):
+        self.finished.wait(timeout)
+        return self.returncode
+
+
+class ProcessSupervisor:
+    """
+    Owns every runner subprocess. All pty masters are multiplexed in one
+    `selectors` loop (epoll on Linux) instead of two threads per command.
+
+    Subscribers are objects with `write(data: bytes)`, `flush()` and `close()`,
+    like `TerminalOutput`: `write` gets every chunk read from the pty, `flush`
+    is called on every loop tick and `close` once the process has exited and
+    its output is drained. Exit callbacks then receive the `ManagedProcess`.
+    The last `FINISHED_KEPT` exited processes stay listed with their return code.
+
+    On Windows there are no ptys to select on, so each process falls back to
+    a reader thread feeding the same subscribers.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.processes = {}
+        # pid -> ManagedProcess that exited, oldest first
+        self.exited = OrderedDict()
+        self.selector = None
+        self.thread = None
+        self.wakeup_read = None
+        self.wakeup_write = None
+        self.logger = Logger()
+
+    def _ensure_loop(self):
+        if self.thread is not None:
+            return
+        if not is_windows:
+            self.selector = selectors.DefaultSelector()
+            self.wakeup_read, self.wakeup_write = os.pipe()
+            os.set_blocking(self.wakeup_read, False)
+            self.selector.register(self.wakeup_read, selectors.EVENT_READ, None)
+        self.thread = threading.Thread(target=self._run, name="process-supervisor", daemon=True)
+        self.thread.start()
+
+    def _wakeup(self):
+        if self.wakeup_write is not None:
+            os.write(self.wakeup_write, b"\0")
+
+    def start(self, command: str, cwd: str, project_name: str = None) -> ManagedProcess:
+        with self.lock:
+            self._ensure_loop()
+            if is_windows:
+                process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                           stderr=subprocess.STDOUT, cwd=cwd, shell=True)
+                managed = ManagedProcess(process, command, cwd, project_name)
+                self._add(managed)
+                threading.Thread(target=self._read_pipe, args=(managed,), daemon=True).start()
+            else:
+                master, slave = pty.openpty()
+                process = subprocess.Popen(command, stdin=slave, stdout=slave, stderr=slave, cwd=cwd,
+                                           shell=True, preexec_fn=os.setsid)
+                os.close(slave)
+                os.set_blocking(master, False)
+                managed = ManagedProcess(process, command, cwd, project_name, master)
+                self._add(managed)
+                self.selector.register(master, selectors.EVENT_READ, managed)
+                self._wakeup()
+        return managed
+
+    def _add(self, managed: ManagedProcess):
+        # The pid may have been reused since an earlier process exited
+        self.exited.pop(managed.pid, None)
+        self.processes[managed.pid] = managed
+
+    def subscribe(self, managed: ManagedProcess, subscriber=None, on_exit=None):
+        """
+        Attach an output subscriber and/or exit callback to a process. If it
+        already finished, the subscriber gets its backlog and is closed, and
+        `on_exit` is called right away.
+        """
+        with self.lock:
+            if subscriber is not None:
+                for data in managed.backlog:
+                    subscriber.write(data)
+                managed.backlog = []
+                managed.subscribers.append(subscriber)
+                if managed.finished.is_set():
+                    subscriber.close()
+            if on_exit is not None:
+                if managed.finished.is_set():
+                    on_exit(managed)
+                else:
+                    managed.exit_callbacks.append(on_exit)
+        return managed
+
+    def get(self, pid: int):
+        with self.lock:
+            return self.processes.get(pid) or self.exited.get(pid)
+
+    def list(self, project_name: str = None) -> list:
+        with self.lock:
+            return [
+                managed.to_dict() for managed in [*self.processes.values(), *self.exited.values()]
+                if project_name is None or managed.project_name == project_name
+            ]
+
+    def kill(self, pid: int, sig: int = None):
+        """Send `sig` (SIGTERM by default) to the process group of `pid`."""
+        managed = self.get(pid)
+        if managed is None or managed.finished.is_set():
+            raise KeyError(f"Process {pid} not found.")
+        if is_windows:
+            managed.process.terminate()
+        else:
+            os.killpg(os.getpgid(managed.pid), sig or signal.SIGTERM)
+
+    def _dispatch(self, managed: ManagedProcess, data: bytes):
+        with self.lock:
+            if managed.subscribers:
+                for subscriber in managed.subscribers:
+                    subscriber.write(data)
+            else:
+                managed.backlog.append(data)
+
+    def _read_master(self, managed: ManagedProcess) -> bool:
+        """Read what is available on the pty, return False once it is closed."""
+        # Bounded so one chatty process cannot starve the others
+        for _ in range(READS_PER_WAKEUP):
+            try:
+                data = os.read(managed.master, READ_SIZE)
+            except BlockingIOError:
+                return True
+            except OSError:
+                # EIO: every process holding the pty slave has exited
+                return False
+            if not data:
+                return False
+            self._dispatch(managed, data)
+        return True
+
+    def _read_pipe(self, managed: ManagedProcess):
+        while True:
+            data = managed.process.stdout.read(READ_SIZE)
+            if not data:
+                break
+            self._dispatch(managed, data)
+        managed.process.wait()
+        self._finish(managed)
+
+    def _close_master(self, managed: ManagedProcess):
+        if managed.master is None:
+            return
+        with self.lock:
+            self.selector.unregister(managed.master)
+        os.close(managed.master)
+        managed.master = None
+
+    def _finish(self, managed: ManagedProcess):
+        managed.returncode = managed.process.returncode
+        with self.lock:
+            managed.finished.set()
+            subscribers = list(managed.subscribers)
+            callbacks = list(managed.exit_callbacks)
+            managed.exit_callbacks = []
+            if self.processes.get(managed.pid) is managed:
+                del self.processes[managed.pid]
+                self.exited[managed.pid] = managed
+                while len(self.exited) > FINISHED_KEPT:
+                    self.exited.popitem(last=False)
+        for subscriber in subscribers:
+            subscriber.close()
+        for callback in callbacks:
+            try:
+                callback(managed)
+            except Exception as e:
+                # Never let a callback take the loop down with it
+                self.logger.error(f"Exit callback for process {managed.pid} failed: {e}")
+
+    def _run(self):
+        if is_windows:
+            # Windows readers run in their own threads, only tick the subscribers here
+            while True:
+                time.sleep(TICK_INTERVAL)
+                self._tick()
+
+        while True:
+            for key, _ in self.selector.select(TICK_INTERVAL):
+                managed = key.data
+                if managed is None:
+                    try:
+                        os.read(self.wakeup_read, READ_SIZE)
+                    except BlockingIOError:
+                        pass
+                elif not self._read_master(managed):
+                    self._close_master(managed)
+            self._tick()
+
+    def _tick(self):
+        with self.lock:
+            processes = list(self.processes.values())
+        for managed in processes:
+            for subscriber in list(managed.subscribers):
+                subscriber.flush()
+            if is_windows or managed.process.poll() is None:
+                continue
+            # Exited: drain what is left, even if a background child keeps the pty open
+            if managed.master is not None:
+                self._read_master(managed)
+                self._close_master(managed)
+            self._finish(managed)
+
+
+supervisor = ProcessSupervisor()
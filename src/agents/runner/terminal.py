@@ -0,0 +1,130 @@
+import codecs
+import glob
+import os
+import re
+import threading
+import time
+
+from src.config import Config
+from src.socket_instance import emit_agent
+
+
+# `<pid>-<start time in ms>`: the OS reuses pids, each run still gets its own log
+RUN_ID = re.compile(r"^\d+-\d+$")
+
+
+def new_run_id(pid: int) -> str:
+    return f"{pid}-{int(time.time() * 1000)}"
+
+
+def get_process_log_path(run_id: str) -> str:
+    return os.path.join(Config().get_logs_dir(), "processes", f"{run_id}.log")
+
+
+def find_process_log(pid: int, run_id: str = None):
+    """Log of run `run_id` of `pid`, or of its latest run."""
+    if run_id is not None:
+        if not RUN_ID.match(run_id) or not run_id.startswith(f"{pid}-"):
+            return None
+        return get_process_log_path(run_id)
+    runs = glob.glob(get_process_log_path(f"{pid}-*"))
+    return max(runs, key=lambda path: int(os.path.basename(path)[:-4].split("-")[1])) if runs else None
+
+
+def read_process_log(pid: int, offset: int = 0, limit: int = 64 * 1024, run_id: str = None) -> dict:
+    """
+    Read up to `limit` bytes of a process log starting at byte `offset`.
+    `offset` in the result is where the next read should start.
+    """
+    log_path = find_process_log(pid, run_id)
+    if log_path is None or not os.path.exists(log_path):
+        return {"data": "", "offset": offset, "size": 0}
+
+    size = os.path.getsize(log_path)
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        data = f.read(limit)
+    return {
+        "data": data.decode("utf-8", errors="replace"),
+        "offset": offset + len(data),
+        "size": size
+    }
+
+
+class TerminalOutput:
+    """
+    Output of one runner subprocess.
+
+    The full log is appended to `<LOGS_DIR>/processes/<pid>-<ms>.log`, only the last
+    `[TERMINAL] BUFFER_SIZE` characters are kept in memory, and new output is
+    coalesced into at most `[TERMINAL] EMITS_PER_SECOND` `terminal-output`
+    events, each carrying only the bytes written since the previous one.
+    """
+
+    def __init__(self, pid: int, command: str, project_name: str):
+        config = Config()
+        self.pid = pid
+        self.command = command
+        self.project_name = project_name
+        self.buffer_size = config.get_terminal_buffer_size()
+        self.emit_interval = 1.0 / config.get_terminal_emits_per_second()
+
+        self.run_id = new_run_id(pid)
+        self.log_path = get_process_log_path(self.run_id)
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self.log_file = open(self.log_path, "wb")
+
+        # pty reads can split multi-byte characters, keep the partial bytes between reads
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.tail = ""
+        self.pending = []
+        self.offset = 0
+        self.last_emit = 0.0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def write(self, data: bytes):
+        self._append(self.decoder.decode(data))
+
+    def _append(self, text: str):
+        if not text:
+            return
+        with self.lock:
+            if self.closed:
+                return
+            self.log_file.write(text.encode("utf-8"))
+            self.tail = (self.tail + text)[-self.buffer_size:]
+            self.pending.append(text)
+
+    def is_due(self) -> bool:
+        return bool(self.pending) and time.monotonic() - self.last_emit >= self.emit_interval
+
+    def flush(self, force: bool = False):
+        """Emit the output written since the last flush, unless one was sent too recently."""
+        with self.lock:
+            if not self.pending or not (force or self.is_due()):
+                return
+            data = "".join(self.pending)
+            self.pending = []
+            offset = self.offset
+            self.offset += len(data.encode("utf-8"))
+            self.last_emit = time.monotonic()
+            if not self.closed:
+                self.log_file.flush()
+
+        emit_agent("terminal-output", {
+            "pid": self.pid,
+            "run": self.run_id,
+            "command": self.command,
+            "project": self.project_name,
+            "offset": offset,
+            "data": data
+        }, log=False)
+
+    def close(self):
+        self._append(self.decoder.decode(b"", final=True))
+        self.flush(force=True)
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.log_file.close()
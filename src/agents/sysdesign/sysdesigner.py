@@ -13,7 +13,7 @@ PROMPT = open("src/agents/sysdesign/prompt.jinja2").read().strip()
 
 class Sysdesigner:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="sysdesigner")
         config = Config()
         self.project_dir = config.get_projects_dir()
 
@@ -65,7 +65,7 @@ class Sysdesigner:
         files = re.findall(r"File: `([^`]+)`", response)
         return files
 
-    def execute(self, prompt: str, productrq: str, project_name: str) -> bool | list[str]:
+    def execute(self, prompt: str, productrq: str, project_name: str, retry: bool = False) -> bool | list[str]:
 
         sstemdesign = "systemdesign"
         sstemdesign_txt = "systemdesign.txt"
@@ -104,13 +104,13 @@ class Sysdesigner:
         #    return
         filenames3 = list(dict.fromkeys(filenames))
         rendered_prompt = self.render(prompt, productrq, filenames3)
-        response = self.llm.inference(rendered_prompt, project_name)
+        response = self.llm.inference(rendered_prompt, project_name, retry=retry)
 
         valid_response = self.validate_response(response)
 
         while not valid_response:
             print("Invalid response from sysdesigner the model , trying again...")
-            return self.execute(prompt, productrq, project_name)
+            return self.execute(prompt, productrq, project_name, retry=True)
         sstemdesign = "systemdesign"
         sstemdesign_txt = "systemdesign.txt"
 
@@ -3,14 +3,13 @@ from flask import blueprints, request, jsonify, send_file, make_response
 from src.logger import Logger, route_logger
 from src.config import Config
 from src.project import ProjectManager
-from src.socket_instance import socketio
+from src.socket_instance import socketio, emit_agent
 
 from src.state import AgentState
+from src.token_usage import TokenUsage
 
 import os
 
-from src.utils import terminate_process
-
 project_bp = blueprints.Blueprint("project", __name__)
 
 logger = Logger()
@@ -34,6 +33,7 @@ def delete_project():
     project_name = data.get("project_name")
     manager.delete_project(project_name)
     AgentState().delete_state(project_name)
+    TokenUsage().delete_project(project_name)
     return jsonify({"message": "Project deleted"})
 
 
@@ -57,8 +57,37 @@ def download_project_pdf():
     response.headers['Content-Type'] = 'project_bplication/pdf'
     return response
 
+@project_bp.route("/api/process-log", methods=["GET"])
+@route_logger(logger)
+def process_log():
+    from src.agents.runner.terminal import read_process_log
+    pid = request.args.get("pid", type=int)
+    if pid is None:
+        return jsonify({"message": "pid is required"}), 400
+    offset = request.args.get("offset", default=0, type=int)
+    limit = request.args.get("limit", default=64 * 1024, type=int)
+    # Without `run`, the latest run of that pid
+    run_id = request.args.get("run")
+    return jsonify(read_process_log(pid, offset, limit, run_id))
+
+
+@project_bp.route("/api/processes", methods=["GET"])
+@route_logger(logger)
+def list_processes():
+    from src.agents.runner.supervisor import supervisor
+    project_name = request.args.get("project_name")
+    return jsonify({"processes": supervisor.list(project_name)})
+
+
 # Handle incoming kill process request from frontend
 @socketio.on('kill_process')
 def handle_kill_process(data):
+    from src.agents.runner.supervisor import supervisor
     pid = data.get('pid')
-    terminate_process(pid)
+    try:
+        supervisor.kill(pid)
+        emit_agent('kill_process_response', {"status": "success", "message": f"Process {pid} terminated."})
+    except KeyError:
+        emit_agent('kill_process_response', {"status": "error", "message": f"Process {pid} not found."})
+    except Exception as e:
+        emit_agent('kill_process_response', {"status": "error", "message": str(e)})
@@ -0,0 +1,209 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Callable, List
+
+import numpy as np
+
+from src.logger import Logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = Logger()
+
+DIGEST_SIZE = 32
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Exclusive lock shared by every process that opens the store."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EmbeddingStore:
+    """
+    Embeddings of one model, append-only on disk.
+
+    `<model>.f16` holds the vectors as float16 rows and `<model>.idx` the
+    sha256 of each row's text, in the same order: the i-th digest is the row
+    at byte offset `i * dim * 2`. The digests are read into a dict on open,
+    the vectors are memory-mapped. A row only counts once both files have it,
+    so a crash mid-append loses that row and nothing else.
+
+    Several processes can share the files: appends hold `<model>.lock`, take
+    their row numbers from the file sizes and first read the digests other
+    processes appended. Past `max_rows` nothing is added any more, which also
+    bounds the digest dict held in memory.
+    """
+
+    def __init__(self, path: str, dim: int, max_rows: int = None):
+        self.vectors_path = path + ".f16"
+        self.index_path = path + ".idx"
+        self.lock_path = path + ".lock"
+        meta_path = path + ".json"
+        self.lock = threading.Lock()
+        self.max_rows = max_rows
+        self.dim = dim
+        self.row_size = dim * 2
+        self.rows = {}
+        self.count = 0
+        self.mapped = None
+
+        with _file_lock(self.lock_path):
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    if json.load(f)["dim"] != dim:
+                        # Another model under the same name: start over
+                        for file in (self.vectors_path, self.index_path):
+                            if os.path.exists(file):
+                                os.remove(file)
+            with open(meta_path, "w") as f:
+                json.dump({"dim": dim}, f)
+            # Drop the half-written row of a crashed append, if any
+            rows = self._complete_rows()
+            for file, size in ((self.index_path, rows * DIGEST_SIZE), (self.vectors_path, rows * self.row_size)):
+                with open(file, "ab") as f:
+                    f.truncate(size)
+            self._sync()
+
+    def _complete_rows(self) -> int:
+        # Vectors are written before their digests, so a complete digest always has its vector
+        sizes = [os.path.getsize(file) if os.path.exists(file) else 0 for file in (self.index_path, self.vectors_path)]
+        return min(sizes[0] // DIGEST_SIZE, sizes[1] // self.row_size)
+
+    def _sync(self):
+        """Pick up the rows other processes appended since the last call."""
+        rows = self._complete_rows()
+        if rows <= self.count:
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self.count * DIGEST_SIZE)
+            digests = f.read((rows - self.count) * DIGEST_SIZE)
+        for i in range(rows - self.count):
+            self.rows.setdefault(digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE], self.count + i)
+        self.count = rows
+
+    def _map(self):
+        if self.mapped is None or len(self.mapped) < self.count:
+            self.mapped = np.memmap(self.vectors_path, dtype="float16", mode="r", shape=(self.count, self.dim))
+        return self.mapped
+
+    def lookup(self, digests: List[bytes]) -> dict:
+        """`{position in digests: row}` for the digests already stored."""
+        with self.lock:
+            if any(digest not in self.rows for digest in digests):
+                self._sync()
+            return {i: self.rows[digest] for i, digest in enumerate(digests) if digest in self.rows}
+
+    def read(self, rows: List[int]) -> np.ndarray:
+        with self.lock:
+            return np.asarray(self._map()[rows], dtype="float32")
+
+    def append(self, digests: List[bytes], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype="float16")
+        with self.lock, _file_lock(self.lock_path):
+            self._sync()
+            new = [i for i, digest in enumerate(digests) if digest not in self.rows]
+            if self.max_rows is not None:
+                if self.count + len(new) > self.max_rows and new:
+                    logger.warning(f"Embedding cache {self.vectors_path} is full ({self.max_rows} rows)")
+                new = new[:max(0, self.max_rows - self.count)]
+            if not new:
+                return
+            # After _sync, `count` is where the complete rows end, whoever wrote them;
+            # the leftovers of a crashed append past it are overwritten
+            start = self.count
+            with open(self.vectors_path, "r+b") as f:
+                f.seek(start * self.row_size)
+                f.write(vectors[new].tobytes())
+                f.truncate()
+            with open(self.index_path, "r+b") as f:
+                f.seek(start * DIGEST_SIZE)
+                f.write(b"".join(digests[i] for i in new))
+                f.truncate()
+            for i in new:
+                self.rows[digests[i]] = self.count
+                self.count += 1
+
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by (model, sha256 of the text), one `EmbeddingStore` per
+    model under `directory`. Rebuilding an index or asking the same question
+    again reads vectors from disk instead of running the model.
+    """
+
+    def __init__(self, directory: str, max_rows: int = None):
+        self.directory = directory
+        self.max_rows = max_rows
+        self.lock = threading.Lock()
+        self.stores = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_store(self, model_id: str, dim: int) -> EmbeddingStore:
+        with self.lock:
+            store = self.stores.get(model_id)
+            if store is None:
+                os.makedirs(self.directory, exist_ok=True)
+                name = re.sub(r"[^\w.@-]", "_", model_id)
+                store = EmbeddingStore(os.path.join(self.directory, name), dim, self.max_rows)
+                self.stores[model_id] = store
+            return store
+
+    def encode(self, model_id: str, dim: int, texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Embeddings of `texts` as float32 rows, running `encode` only on the
+        texts not stored yet. Every vector goes through float16, so a text
+        gets the same vector whether it was cached or not.
+        """
+        store = self.get_store(model_id, dim)
+        digests = [hashlib.sha256(text.encode("utf-8")).digest() for text in texts]
+        found = store.lookup(digests)
+        result = np.empty((len(texts), dim), dtype="float32")
+        if found:
+            positions = list(found)
+            result[positions] = store.read([found[i] for i in positions])
+
+        missing = [i for i in range(len(texts)) if i not in found]
+        if missing:
+            # Each distinct text is encoded once, even if it's repeated in the batch
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            vectors = np.asarray(encode(unique), dtype="float16")
+            store.append([hashlib.sha256(text.encode("utf-8")).digest() for text in unique], vectors)
+            by_text = dict(zip(unique, vectors.astype("float32")))
+            for i in missing:
+                result[i] = by_text[texts[i]]
+
+        with self.lock:
+            self.hits += len(found)
+            self.misses += len(missing)
+        return result
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "models": {model_id: store.count for model_id, store in self.stores.items()}
+            }
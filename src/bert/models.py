@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+from src.bert.embedding_cache import EmbeddingCache
+from src.config import Config
+from src.logger import Logger
+
+logger = Logger()
+
+# "torch" is the reference; the others trade a little precision for CPU time and memory
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+def _rss_mb():
+    # Current resident set size, where the OS exposes it cheaply (Linux)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _parameters_mb(model) -> float:
+    # state_dict() rather than parameters(): quantized Linear layers keep their
+    # packed int8 weights outside of the parameter list
+    import torch
+
+    total = 0
+    for value in model.state_dict().values():
+        if isinstance(value, tuple):
+            # Packed (weight, bias) of a dynamically quantized Linear
+            value = [item for item in value if isinstance(item, torch.Tensor)]
+        else:
+            value = [value] if isinstance(value, torch.Tensor) else []
+        total += sum(tensor.numel() * tensor.element_size() for tensor in value)
+    return total / 1024 / 1024
+
+
+def _load_sentence_transformer(name: str, backend: str):
+    """
+    SentenceTransformer `name` on one of the `EMBEDDING_BACKENDS`. Every backend
+    keeps the `encode` API, so KeyBERT and the knowledge base work on any of them.
+    The ONNX ones need `optimum[onnxruntime]` and fall back to torch without it.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in EMBEDDING_BACKENDS:
+        logger.warning(f"Unknown embedding backend '{backend}', using torch")
+    elif backend == "torch-int8":
+        import torch
+        model = SentenceTransformer(name, device="cpu")
+        # int8 weights for every Linear layer, activations quantized on the fly
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    elif backend.startswith("onnx"):
+        model_kwargs = {"file_name": Config().get_embeddings_onnx_int8_file()} if backend == "onnx-int8" else None
+        try:
+            return SentenceTransformer(name, backend="onnx", model_kwargs=model_kwargs)
+        except (ImportError, TypeError) as e:
+            # TypeError: sentence-transformers before 3.2 has no `backend`
+            logger.warning(f"ONNX embedding backend unavailable ({e}), using torch")
+    return SentenceTransformer(name)
+
+
+class ModelRegistry:
+    """
+    Embedding and keyword models, each loaded once per process on first use.
+
+    KeyBERT is built on the same SentenceTransformer as the knowledge base, so
+    `[EMBEDDINGS] MODEL`, running on `[EMBEDDINGS] BACKEND`, is the only
+    transformer held in memory. Load time and memory footprint of every model
+    are kept for `stats()`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.models = {}
+        self.model_stats = {}
+        self.embedding_cache = None
+
+    def _get(self, key: str, load):
+        model = self.models.get(key)
+        if model is not None:
+            return model
+        with self.lock:
+            model = self.models.get(key)
+            if model is None:
+                rss_before = _rss_mb()
+                start = time.perf_counter()
+                model = load()
+                seconds = time.perf_counter() - start
+                rss_after = _rss_mb()
+                stats = {"load_seconds": round(seconds, 2), "rss_delta_mb": None, "parameters_mb": None}
+                if rss_before is not None and rss_after is not None:
+                    stats["rss_delta_mb"] = round(rss_after - rss_before, 1)
+                if hasattr(model, "parameters"):
+                    stats["parameters_mb"] = round(_parameters_mb(model), 1)
+                self.model_stats[key] = stats
+                self.models[key] = model
+                logger.info(f"Loaded {key} in {seconds:.2f}s")
+        return model
+
+    def get_sentence_transformer(self, name: str = None, backend: str = None):
+        config = Config()
+        name = name or config.get_embeddings_model()
+        backend = backend or config.get_embeddings_backend()
+        return self._get(f"sentence-transformer:{name}:{backend}", lambda: _load_sentence_transformer(name, backend))
+
+    def embed(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Embeddings of `texts` with the configured model and backend, through the
+        on-disk embedding cache when `[EMBEDDINGS] CACHE` is on (up to
+        `CACHE_MAX_ROWS` texts). Every embedding of the project goes through
+        here, KeyBERT's included.
+        """
+        config = Config()
+        model = self.get_sentence_transformer()
+        if not config.get_embeddings_cache_enabled():
+            return np.asarray(model.encode(texts, batch_size=batch_size), dtype="float32")
+        if self.embedding_cache is None:
+            with self.lock:
+                if self.embedding_cache is None:
+                    directory = os.path.join(os.path.dirname(config.get_sqlite_db()), "embeddings")
+                    self.embedding_cache = EmbeddingCache(directory, config.get_embeddings_cache_max_rows())
+        model_id = f"{config.get_embeddings_model()}@{config.get_embeddings_backend()}"
+        return self.embedding_cache.encode(model_id, model.get_sentence_embedding_dimension(), texts,
+                                           lambda missing: model.encode(missing, batch_size=batch_size))
+
+    def get_keybert(self):
+        # Loaded first and outside of the lock: KeyBERT only wraps it
+        self.get_sentence_transformer()
+
+        def load():
+            from keybert import KeyBERT
+            from keybert.backend import BaseEmbedder
+
+            registry = self
+
+            class CachedEmbedder(BaseEmbedder):
+                # Documents and candidate words are embedded through `embed`, cache included
+                def embed(self, documents, verbose=False):
+                    return registry.embed(list(documents))
+
+            return KeyBERT(model=CachedEmbedder())
+
+        return self._get("keybert", load)
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = {key: dict(stats) for key, stats in self.model_stats.items()}
+        if self.embedding_cache is not None:
+            stats["embedding_cache"] = self.embedding_cache.stats()
+        return stats
+
+
+model_registry = ModelRegistry()
@@ -1,17 +1,62 @@
-from keybert import KeyBERT
+import re
+import threading
+from collections import OrderedDict
+from typing import List
 
-class SentenceBert:
-    def __init__(self, sentence: str):
-        self.sentence = sentence
-        self.kw_model = KeyBERT()
+from src.bert.models import model_registry
 
-    def extract_keywords(self, top_n: int = 5) -> list:
-        keywords = self.kw_model.extract_keywords(
-            self.sentence,
+# Sentences whose keywords are remembered, the planner's focus comes back on every step
+KEYWORD_CACHE_SIZE = 256
+
+_keyword_cache = OrderedDict()
+_keyword_cache_lock = threading.Lock()
+
+
+def _normalize(sentence: str) -> str:
+    return re.sub(r"\s+", " ", sentence).strip().lower()
+
+
+def extract_keywords_batch(sentences: List[str], top_n: int = 5) -> List[list]:
+    """
+    KeyBERT keywords of every sentence, in order. Sentences seen before are
+    answered from an LRU cache; the others are embedded together, with their
+    candidate words, in one forward pass each.
+    """
+    keys = [(_normalize(sentence), top_n) for sentence in sentences]
+    results = {}
+    with _keyword_cache_lock:
+        for key in keys:
+            if key in _keyword_cache:
+                _keyword_cache.move_to_end(key)
+                results[key] = _keyword_cache[key]
+
+    missing = list(dict.fromkeys(key for key in keys if key not in results))
+    if missing:
+        keywords = model_registry.get_keybert().extract_keywords(
+            [sentence for sentence, _ in missing],
             keyphrase_ngram_range=(1, 1),
             stop_words='english',
             top_n=top_n,
             use_mmr=True,
             diversity=0.7
         )
-        return keywords
+        # KeyBERT unwraps the result of a single document
+        if len(missing) == 1:
+            keywords = [keywords]
+        with _keyword_cache_lock:
+            for key, sentence_keywords in zip(missing, keywords):
+                results[key] = sentence_keywords
+                _keyword_cache[key] = sentence_keywords
+                _keyword_cache.move_to_end(key)
+            while len(_keyword_cache) > KEYWORD_CACHE_SIZE:
+                _keyword_cache.popitem(last=False)
+
+    return [list(results[key]) for key in keys]
+
+
+class SentenceBert:
+    def __init__(self, sentence: str):
+        self.sentence = sentence
+
+    def extract_keywords(self, top_n: int = 5) -> list:
+        return extract_keywords_batch([self.sentence], top_n)[0]
@@ -0,0 +1,136 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+from src.config import Config
+from src.logger import Logger
+
+logger = Logger()
+
+# Worth another try: rate limited or a transient server error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HostStats:
+    """Request count, failures and latency per host."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def record(self, url: str, seconds: float, ok: bool):
+        host = urlparse(url).netloc
+        with self.lock:
+            stats = self.hosts.setdefault(host, {"requests": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["requests"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["total_ms"] += seconds * 1000
+            stats["max_ms"] = max(stats["max_ms"], seconds * 1000)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                host: {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "avg_ms": round(stats["total_ms"] / stats["requests"], 1),
+                    "max_ms": round(stats["max_ms"], 1)
+                }
+                for host, stats in self.hosts.items()
+            }
+
+
+class HttpClient:
+    """
+    Process-wide HTTP client for search engines and scraping.
+
+    One `httpx.Client` keeps connections alive per host (HTTP/2 when the `h2`
+    package is installed), with the timeout and connection limits from
+    `[HTTP]`. Connection errors and 429/5xx answers are retried up to
+    `[HTTP] RETRIES` times with exponential backoff, honouring `Retry-After`.
+
+    DuckDuckGo needs a browser-impersonating `curl_cffi` session; those are
+    kept one per thread and go through the same retries and latency stats.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.client = None
+        self.local = threading.local()
+        self.stats = HostStats()
+
+    def get_client(self) -> httpx.Client:
+        if self.client is None:
+            with self.lock:
+                if self.client is None:
+                    config = Config()
+                    http2 = config.get_http_http2() and _http2_available()
+                    max_connections = config.get_http_max_connections()
+                    self.client = httpx.Client(
+                        http2=http2,
+                        timeout=httpx.Timeout(config.get_http_timeout()),
+                        limits=httpx.Limits(max_connections=max_connections,
+                                            max_keepalive_connections=max_connections),
+                        follow_redirects=True,
+                        headers={"User-Agent": USER_AGENT}
+                    )
+                    logger.info(f"HTTP client ready (HTTP/2: {http2})")
+        return self.client
+
+    def get_curl_session(self):
+        session = getattr(self.local, "curl_session", None)
+        if session is None:
+            from curl_cffi import requests as curl_requests
+            session = curl_requests.Session(impersonate="chrome", timeout=Config().get_http_timeout())
+            self.local.curl_session = session
+        return session
+
+    def _send(self, url: str, send):
+        config = Config()
+        retries = config.get_http_retries()
+        backoff = config.get_http_backoff()
+        for attempt in range(retries + 1):
+            start = time.perf_counter()
+            try:
+                response = send()
+            except Exception:
+                self.stats.record(url, time.perf_counter() - start, ok=False)
+                if attempt == retries:
+                    raise
+                time.sleep(backoff * 2 ** attempt)
+                continue
+
+            ok = response.status_code not in RETRY_STATUSES
+            self.stats.record(url, time.perf_counter() - start, ok=ok)
+            if ok or attempt == retries:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            time.sleep(float(retry_after) if retry_after.isdigit() else backoff * 2 ** attempt)
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        client = self.get_client()
+        return self._send(url, lambda: client.request(method, url, **kwargs))
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def curl_request(self, method: str, url: str, **kwargs):
+        session = self.get_curl_session()
+        return self._send(url, lambda: session.request(method, url, **kwargs))
+
+    def get_stats(self) -> dict:
+        return self.stats.to_dict()
+
+
+http_client = HttpClient()
@@ -515,7 +515,7 @@ def start_interaction(model_id, objective, project_name):
         prompt = prompt.replace("$url", url[:100])
         prompt = prompt.replace("$previous_command", previous_command)
         prompt = prompt.replace("$browser_content", browser_content1[:4500])
-        response = LLM(model_id=model_id).inference(prompt, project_name)
+        response = LLM(model_id=model_id, agent="browser_interaction").inference(prompt, project_name)
         return response
 
     def run_cmd(cmd):
@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from src.config import Config
+from src.logger import Logger
+
+logger = Logger()
+
+
+class HostLimiter:
+    """Caps the number of requests in flight to the same host."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self.lock = threading.Lock()
+        self.semaphores = {}
+
+    def get(self, url_or_host: str) -> threading.Semaphore:
+        host = urlparse(url_or_host).netloc or url_or_host
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self.semaphores[host]
+
+
+def run_research(queries: list, engine: str, make_search, scrape, format_text, on_link=None) -> dict:
+    """
+    Search, scrape and format every query concurrently.
+
+    Each query runs `make_search().search(query)`, scrapes the first link
+    with `scrape(url)` and turns the page into text with
+    `format_text(data, query)`, on a pool of `[RESEARCH] MAX_WORKERS` threads.
+    Requests to the same host (the search engine included) are limited to
+    `[RESEARCH] PER_HOST_LIMIT` at a time. `on_link(number, query, link)` is
+    called as links are found, numbered from 1 in the order they come in.
+
+    Returns `{query: text}` in query order; a query asked twice gets both
+    texts concatenated. Queries that fail are logged and left out.
+    """
+    config = Config()
+    limiter = HostLimiter(config.get_research_per_host_limit())
+    link_lock = threading.Lock()
+    link_count = 0
+    queries = [query.strip().lower() for query in queries]
+
+    def research(query: str):
+        nonlocal link_count
+        try:
+            with limiter.get(engine):
+                web_search = make_search()
+                web_search.search(query)
+                link = web_search.get_first_link()
+            if not link:
+                return None
+            if on_link:
+                with link_lock:
+                    link_count += 1
+                    on_link(link_count, query, link)
+            with limiter.get(link):
+                data = scrape(link)
+            text = format_text(data, query)
+            logger.info(f"got the search results for : {query}")
+            return text
+        except Exception as e:
+            logger.warning(f"Research failed for '{query}': {e}")
+            return None
+
+    results = {}
+    if not queries:
+        return results
+    workers = min(config.get_research_max_workers(), len(queries))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="research") as pool:
+        for query, text in zip(queries, pool.map(research, queries)):
+            if text is None:
+                continue
+            results[query] = results[query] + text if query in results else text
+    return results
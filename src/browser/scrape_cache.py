@@ -0,0 +1,160 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import func
+from sqlmodel import Field, Session, SQLModel
+
+from src.browser.http_client import http_client
+from src.config import Config
+from src.database import get_engine
+from src.logger import Logger
+
+logger = Logger()
+
+_scrape_cache = None
+_scrape_cache_lock = threading.Lock()
+
+
+class ScrapedPage(SQLModel, table=True):
+    __tablename__ = "scraped_pages"
+
+    url: str = Field(primary_key=True)
+    html: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    size: int
+    fetched_at: float
+    last_access: float = Field(index=True)
+
+
+class ScrapeCache:
+    """
+    Scraped pages keyed by URL, with the raw HTML and the cleaned text.
+
+    A page fetched less than `[SCRAPE_CACHE] TTL_HOURS` ago is served as is.
+    Older pages are revalidated with `If-None-Match` / `If-Modified-Since`:
+    a 304 keeps the stored copy for another TTL, anything else replaces it.
+    When the origin can't be reached the stale copy is still served. Pages are
+    evicted least-recently-used first once they exceed `[SCRAPE_CACHE] MAX_SIZE_MB`.
+
+    `client` defaults to the shared `http_client` and `sqlite_path` to the
+    configured database, so a test can point both somewhere else.
+    """
+
+    def __init__(self, client=None, sqlite_path: str = None):
+        self.client = client or http_client
+        self.engine = get_engine(sqlite_path)
+        self.lock = threading.Lock()
+        self.counts = {"hits": 0, "revalidated": 0, "misses": 0, "stale": 0}
+
+    def _count(self, outcome: str):
+        with self.lock:
+            self.counts[outcome] += 1
+
+    def fetch(self, url: str, clean: Callable[[str], str]) -> str:
+        """
+        Cleaned text of `url`, from the cache when possible. `clean(html)` turns
+        a freshly downloaded page into text; HTTP errors propagate when there is
+        nothing cached to fall back on.
+        """
+        config = Config()
+        if not config.get_scrape_cache_enabled():
+            response = self.client.get(url)
+            response.raise_for_status()
+            return clean(response.text)
+
+        now = time.time()
+        with Session(self.engine) as session:
+            entry = session.get(ScrapedPage, url)
+            if entry and now - entry.fetched_at < config.get_scrape_cache_ttl_hours() * 3600:
+                entry.last_access = now
+                text = entry.text
+                session.commit()
+                self._count("hits")
+                return text
+
+            headers = {}
+            if entry and entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry and entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+            try:
+                response = self.client.get(url, headers=headers)
+                if response.status_code != 304:
+                    response.raise_for_status()
+            except Exception as e:
+                if entry is None:
+                    raise
+                logger.warning(f"Serving stale copy of {url}: {e}")
+                entry.last_access = now
+                text = entry.text
+                session.commit()
+                self._count("stale")
+                return text
+
+            if response.status_code == 304 and entry:
+                entry.fetched_at = entry.last_access = now
+                text = entry.text
+                session.commit()
+                self._count("revalidated")
+                return text
+
+            html = response.text
+            text = clean(html)
+            size = len(html.encode("utf-8")) + len(text.encode("utf-8"))
+            if entry is None:
+                entry = ScrapedPage(url=url, html=html, text=text, size=size, fetched_at=now, last_access=now)
+                session.add(entry)
+            else:
+                entry.html, entry.text, entry.size = html, text, size
+            entry.etag = response.headers.get("ETag")
+            entry.last_modified = response.headers.get("Last-Modified")
+            entry.fetched_at = entry.last_access = now
+            session.commit()
+            self._evict(session)
+        self._count("misses")
+        return text
+
+    def get_html(self, url: str) -> Optional[str]:
+        """Raw HTML of a cached page, without touching the network."""
+        with Session(self.engine) as session:
+            entry = session.get(ScrapedPage, url)
+            return entry.html if entry else None
+
+    def _evict(self, session: Session):
+        max_size = Config().get_scrape_cache_max_size_mb() * 1024 * 1024
+        total = session.query(func.coalesce(func.sum(ScrapedPage.size), 0)).scalar()
+        if total <= max_size:
+            return
+        for entry in session.query(ScrapedPage).order_by(ScrapedPage.last_access):
+            session.delete(entry)
+            total -= entry.size
+            if total <= max_size:
+                break
+        session.commit()
+
+    def clear(self):
+        with Session(self.engine) as session:
+            session.query(ScrapedPage).delete()
+            session.commit()
+
+    def stats(self) -> dict:
+        with Session(self.engine) as session:
+            entries, size = session.query(
+                func.count(ScrapedPage.url),
+                func.coalesce(func.sum(ScrapedPage.size), 0)
+            ).one()
+        with self.lock:
+            return {**self.counts, "entries": entries, "size_bytes": size}
+
+
+def get_scrape_cache() -> ScrapeCache:
+    """Return the process-wide cache on the configured database, creating it on first use."""
+    global _scrape_cache
+    with _scrape_cache_lock:
+        if _scrape_cache is None:
+            _scrape_cache = ScrapeCache()
+    return _scrape_cache
@@ -1,7 +1,6 @@
-import threading
-
-import requests
 from src.config import Config
+from src.browser.http_client import http_client
+from src.browser.search_cache import search_cache
 
 import re
 from urllib.parse import unquote
@@ -17,17 +16,30 @@ class BingSearch:
         self.query_result = None
 
     def search(self, query):
+        cached = search_cache.get("bing", query)
+        if cached is not None:
+            self.query_result = cached
+            return self.query_result
+
         headers = {"Ocp-Apim-Subscription-Key": self.bing_api_key}
         params = {"q": query, "mkt": "en-US"}
 
         try:
-            response = requests.get(self.bing_api_endpoint, headers=headers, params=params)
+            response = http_client.get(self.bing_api_endpoint, headers=headers, params=params)
             response.raise_for_status()
             self.query_result = response.json()
+            if self.get_results():
+                search_cache.put("bing", query, self.query_result)
             return self.query_result
         except Exception as error:
             return error
 
+    def get_results(self):
+        return [
+            {"title": page.get("name", ""), "href": page["url"], "body": page.get("snippet", "")}
+            for page in (self.query_result or {}).get("webPages", {}).get("value", [])
+        ]
+
     def get_first_link(self):
         return self.query_result["webPages"]["value"][0]["url"]
 
@@ -41,6 +53,11 @@ class GoogleSearch:
         self.query_result = None
 
     def search(self, query):
+        cached = search_cache.get("google", query)
+        if cached is not None:
+            self.query_result = cached
+            return
+
         params = {
             "key": self.google_search_api_key,
             "cx": self.google_search_engine_ID,
@@ -48,12 +65,20 @@ class GoogleSearch:
         }
         try:
             print("Searching in Google...")
-            response = requests.get(self.google_search_api_endpoint, params=params)
+            response = http_client.get(self.google_search_api_endpoint, params=params)
             # response.raise_for_status()
             self.query_result = response.json()
+            if self.get_results():
+                search_cache.put("google", query, self.query_result)
         except Exception as error:
             return error
 
+    def get_results(self):
+        return [
+            {"title": item.get("title", ""), "href": item["link"], "body": item.get("snippet", "")}
+            for item in (self.query_result or {}).get("items", [])
+        ]
+
     def get_first_link(self):
         item = ""
         if 'items' in self.query_result:
@@ -90,14 +115,13 @@ class DuckDuckGoSearch:
     currently, the package is not working with our current setup.
     """
     def __init__(self):
-        from curl_cffi import requests as curl_requests
         self.query_result = None
-        self.asession = curl_requests.Session(impersonate="chrome", allow_redirects=False)
-        self.asession.headers["Referer"] = "https://duckduckgo.com/"
 
     def _get_url(self, method, url, data):
         try:
-            resp = self.asession.request(method, url, data=data)
+            # Impersonating session shared with the other searches of this thread, see http_client
+            resp = http_client.curl_request(method, url, data=data, allow_redirects=False,
+                                            headers={"Referer": "https://duckduckgo.com/"})
             if resp.status_code == 200:
                 return resp.content
             if resp.status_code == (202, 301, 403):
@@ -132,7 +156,16 @@ class DuckDuckGoSearch:
         self.query_result = results
 
     def search(self, query):
+        cached = search_cache.get("duckduckgo", query)
+        if cached is not None:
+            self.query_result = cached
+            return
         self.duck(query)
+        if self.query_result:
+            search_cache.put("duckduckgo", query, self.query_result)
+
+    def get_results(self):
+        return self.query_result or []
 
     def get_first_link(self):
         return self.query_result[0]["href"]
@@ -164,3 +197,12 @@ class DuckDuckGoSearch:
     @staticmethod
     def normalize(raw_html: str) -> str:
         return unescape(re.sub("<.*?>", "", raw_html)) if raw_html else ""
+
+
+def get_search_engine(engine: str):
+    """New search object for `engine` ("bing", "google", anything else is DuckDuckGo)."""
+    if engine == "bing":
+        return BingSearch()
+    elif engine == "google":
+        return GoogleSearch()
+    return DuckDuckGoSearch()
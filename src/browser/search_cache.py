@@ -0,0 +1,95 @@
+import json
+import re
+import threading
+import time
+
+from sqlalchemy import func
+from sqlmodel import Field, Session, SQLModel
+
+from src.config import Config
+from src.database import get_engine
+
+
+class SearchResult(SQLModel, table=True):
+    __tablename__ = "search_results"
+
+    key: str = Field(primary_key=True)
+    engine: str
+    query: str
+    results: str
+    created_at: float = Field(index=True)
+
+
+def normalize_query(query: str) -> str:
+    """Case, surrounding punctuation and repeated whitespace don't change what a search returns."""
+    return re.sub(r"\s+", " ", query).strip().strip("?.!").strip().lower()
+
+
+class SearchCache:
+    """
+    Raw search engine answers keyed by engine and normalized query, shared by
+    every project and dropped after `[SEARCH_CACHE] TTL_HOURS`.
+
+    The whole answer is stored (the API JSON for Bing/Google, the result list
+    for DuckDuckGo), so anything a search object can read from a live answer
+    it can read from a cached one.
+    """
+
+    def __init__(self, sqlite_path: str = None):
+        self.engine = get_engine(sqlite_path)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(engine: str, query: str) -> str:
+        return f"{engine}:{normalize_query(query)}"
+
+    def get(self, engine: str, query: str):
+        config = Config()
+        if not config.get_search_cache_enabled():
+            return None
+        max_age = config.get_search_cache_ttl_hours() * 3600
+        with Session(self.engine) as session:
+            entry = session.get(SearchResult, self.make_key(engine, query))
+            results = json.loads(entry.results) if entry and time.time() - entry.created_at < max_age else None
+        with self.lock:
+            if results is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return results
+
+    def put(self, engine: str, query: str, results):
+        if not Config().get_search_cache_enabled():
+            return
+        key = self.make_key(engine, query)
+        now = time.time()
+        with Session(self.engine) as session:
+            entry = session.get(SearchResult, key)
+            if entry:
+                entry.results = json.dumps(results)
+                entry.created_at = now
+            else:
+                session.add(SearchResult(key=key, engine=engine, query=normalize_query(query),
+                                         results=json.dumps(results), created_at=now))
+            self._purge(session, now)
+            session.commit()
+
+    def _purge(self, session: Session, now: float):
+        max_age = Config().get_search_cache_ttl_hours() * 3600
+        session.query(SearchResult).filter(SearchResult.created_at < now - max_age).delete()
+
+    def clear(self):
+        with Session(self.engine) as session:
+            session.query(SearchResult).delete()
+            session.commit()
+
+    def stats(self) -> dict:
+        with Session(self.engine) as session:
+            entries = session.query(func.count(SearchResult.key)).scalar()
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+search_cache = SearchCache()
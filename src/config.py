@@ -168,6 +168,123 @@ class Config:
     def set_logging_prompts(self, value):
         self.config["LOGGING"]["LOG_PROMPTS"] = "true" if value else "false"
         self.save_config()
+    # Agent state write-behind cache, optional so older config.toml files keep working
+    def get_state_write_behind(self):
+        return self.config.get("STATE", {}).get("WRITE_BEHIND", "false") == "true"
+
+    def get_state_flush_interval(self):
+        return float(self.config.get("STATE", {}).get("FLUSH_INTERVAL", 1.0))
+
+    def get_state_max_pending(self):
+        return int(self.config.get("STATE", {}).get("MAX_PENDING", 500))
+
+    def get_terminal_buffer_size(self):
+        return int(self.config.get("TERMINAL", {}).get("BUFFER_SIZE", 16384))
+
+    def get_terminal_emits_per_second(self):
+        return float(self.config.get("TERMINAL", {}).get("EMITS_PER_SECOND", 4))
+
+    def get_llm_cache_enabled(self):
+        return self.config.get("LLM_CACHE", {}).get("ENABLED", "true") == "true"
+
+    def get_llm_cache_max_size_mb(self):
+        return float(self.config.get("LLM_CACHE", {}).get("MAX_SIZE_MB", 256))
+
+    def get_llm_cache_excluded_agents(self):
+        return self.config.get("LLM_CACHE", {}).get("EXCLUDED_AGENTS", ["coder", "patcher", "feature", "incdev", "iaedit"])
+
+    def get_codegen_workers(self, provider: str = None):
+        codegen = self.config.get("CODEGEN", {})
+        # Local Ollama serves one generation at a time, hosted APIs take several
+        provider_workers = {"OLLAMA": 1, **codegen.get("PROVIDER_WORKERS", {})}
+        if provider in provider_workers:
+            return int(provider_workers[provider])
+        return int(codegen.get("WORKERS", 4))
+
+    def get_codegen_dependency_context_chars(self):
+        return int(self.config.get("CODEGEN", {}).get("DEPENDENCY_CONTEXT_CHARS", 12000))
+
+    def get_research_max_workers(self):
+        return int(self.config.get("RESEARCH", {}).get("MAX_WORKERS", 8))
+
+    def get_research_per_host_limit(self):
+        return int(self.config.get("RESEARCH", {}).get("PER_HOST_LIMIT", 2))
+
+    def get_http_timeout(self):
+        return float(self.config.get("HTTP", {}).get("TIMEOUT", 15))
+
+    def get_http_retries(self):
+        return int(self.config.get("HTTP", {}).get("RETRIES", 2))
+
+    def get_http_backoff(self):
+        return float(self.config.get("HTTP", {}).get("BACKOFF", 0.5))
+
+    def get_http_max_connections(self):
+        return int(self.config.get("HTTP", {}).get("MAX_CONNECTIONS", 20))
+
+    def get_http_http2(self):
+        return self.config.get("HTTP", {}).get("HTTP2", "true") == "true"
+
+    def get_scrape_cache_enabled(self):
+        return self.config.get("SCRAPE_CACHE", {}).get("ENABLED", "true") == "true"
+
+    def get_scrape_cache_ttl_hours(self):
+        return float(self.config.get("SCRAPE_CACHE", {}).get("TTL_HOURS", 24))
+
+    def get_scrape_cache_max_size_mb(self):
+        return float(self.config.get("SCRAPE_CACHE", {}).get("MAX_SIZE_MB", 128))
+
+    def get_search_cache_enabled(self):
+        return self.config.get("SEARCH_CACHE", {}).get("ENABLED", "true") == "true"
+
+    def get_search_cache_ttl_hours(self):
+        return float(self.config.get("SEARCH_CACHE", {}).get("TTL_HOURS", 72))
+
+    def get_embeddings_model(self):
+        return self.config.get("EMBEDDINGS", {}).get("MODEL", "all-MiniLM-L6-v2")
+
+    def get_embeddings_backend(self):
+        return self.config.get("EMBEDDINGS", {}).get("BACKEND", "torch")
+
+    def get_embeddings_onnx_int8_file(self):
+        return self.config.get("EMBEDDINGS", {}).get("ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+    def get_embeddings_cache_enabled(self):
+        return self.config.get("EMBEDDINGS", {}).get("CACHE", "true") == "true"
+
+    def get_embeddings_cache_max_rows(self):
+        return int(self.config.get("EMBEDDINGS", {}).get("CACHE_MAX_ROWS", 500000))
+
+    def get_knowledge_index_type(self):
+        return self.config.get("KNOWLEDGE_BASE", {}).get("INDEX_TYPE", "flat")
+
+    def get_knowledge_index_pq(self):
+        return self.config.get("KNOWLEDGE_BASE", {}).get("PQ", "false") == "true"
+
+    def get_knowledge_pq_m(self):
+        return int(self.config.get("KNOWLEDGE_BASE", {}).get("PQ_M", 48))
+
+    def get_knowledge_ivf_nprobe(self):
+        return int(self.config.get("KNOWLEDGE_BASE", {}).get("NPROBE", 16))
+
+    def get_knowledge_hnsw_m(self):
+        return int(self.config.get("KNOWLEDGE_BASE", {}).get("HNSW_M", 32))
+
+    def get_knowledge_hnsw_ef_search(self):
+        return int(self.config.get("KNOWLEDGE_BASE", {}).get("EF_SEARCH", 64))
+
+    def get_knowledge_min_score(self):
+        return float(self.config.get("KNOWLEDGE_BASE", {}).get("MIN_SCORE", 0.3))
+
+    def get_code_index_enabled(self):
+        return self.config.get("CODE_INDEX", {}).get("ENABLED", "true") == "true"
+
+    def get_code_index_token_budget(self):
+        return int(self.config.get("CODE_INDEX", {}).get("TOKEN_BUDGET", 6000))
+
+    def get_code_index_chunk_lines(self):
+        return int(self.config.get("CODE_INDEX", {}).get("CHUNK_LINES", 80))
+
     # Getter methods for inference settings
     def get_temperature(self):
         return self.config["INFERENCE_SETTINGS"]["TEMPERATURE"]
@@ -0,0 +1,71 @@
+import os
+import threading
+
+from sqlalchemy import event
+from sqlmodel import SQLModel, create_engine
+
+from src.config import Config
+
+# Applied to every new SQLite connection. WAL lets readers run while an agent
+# thread writes, NORMAL is durable across application crashes in WAL mode, and
+# busy_timeout makes concurrent writers wait instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
+
+_engines = {}
+_known_tables = {}
+_engines_lock = threading.Lock()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def get_engine(sqlite_path: str = None):
+    """
+    Return the process-wide engine for `sqlite_path` (defaults to the configured
+    database), creating it and its tables on first use.
+
+    Every `AgentState`, `ProjectManager` and `KnowledgeBase` shares the same
+    engine and connection pool, so constructing them in a loop is cheap.
+    """
+    if sqlite_path is None:
+        sqlite_path = Config().get_sqlite_db()
+    key = os.path.abspath(sqlite_path)
+
+    engine = _engines.get(key)
+    if engine is not None and _known_tables.get(key) == len(SQLModel.metadata.tables):
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = create_engine(
+                f"sqlite:///{sqlite_path}",
+                connect_args={"check_same_thread": False},
+            )
+            event.listen(engine, "connect", _set_sqlite_pragmas)
+            _engines[key] = engine
+        # Table models register themselves on import, so create whatever
+        # was imported since the last call (e.g. `Knowledge` loaded lazily)
+        table_count = len(SQLModel.metadata.tables)
+        if _known_tables.get(key) != table_count:
+            SQLModel.metadata.create_all(engine)
+            _known_tables[key] = table_count
+    return engine
+
+
+def dispose_engines():
+    """Close every pooled connection, e.g. at shutdown or before deleting the DB file."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _known_tables.clear()
@@ -12,7 +12,7 @@ PROMPT = open("src/experts/chemistry/prompt.jinja2").read().strip()
 
 class Chemistry:
     def __init__(self, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="chemistry")
 
     def render(self, prompt: str) -> str:
         env = Environment(loader=BaseLoader())
@@ -143,15 +143,15 @@ class Chemistry:
 
         return parsed_data
 
-    def execute(self, prompt: str, project_name: str) -> str:
+    def execute(self, prompt: str, project_name: str, retry: bool = False) -> str:
         rendered_prompt = self.render(prompt)
-        response = self.llm.inference(rendered_prompt, project_name)
+        response = self.llm.inference(rendered_prompt, project_name, retry=retry)
 
         valid_response = self.validate_response(response)
 
         while not valid_response:
             print("Invalid response from the model, trying again...")
-            return self.execute(prompt, project_name)
+            return self.execute(prompt, project_name, retry=True)
 
         #mol = self.parse_smile(smile)
         #properties = self.get_molecule_properties(mol)
@@ -1 +1,2 @@
-from .read_code import ReadCode
\ No newline at end of file
+from .read_code import ReadCode
+from .file_blocks import FileBlockParser, parse_file_blocks, stream_file_blocks
@@ -0,0 +1,187 @@
+import os
+import posixpath
+import re
+from typing import Dict, List, Set
+
+# Files that can import each other, by extension
+FAMILIES = {
+    ".js": "js", ".jsx": "js", ".ts": "js", ".tsx": "js", ".mjs": "js", ".cjs": "js",
+    ".vue": "js", ".svelte": "js",
+    ".py": "py",
+    ".css": "style", ".scss": "style", ".sass": "style", ".less": "style",
+    ".html": "html", ".htm": "html",
+}
+
+# Role of a file from its name or directory: lower ranks are written first and
+# given to higher ranks as context
+ROLE_RANKS = [
+    ({"config", "settings", "constants", "const", "types", "env"}, 0),
+    ({"models", "model", "schema", "schemas", "database", "db"}, 1),
+    ({"api", "utils", "util", "helpers", "helper", "lib", "services", "service", "store", "stores", "hooks",
+      "context"}, 2),
+]
+OTHER_RANK = 3
+ENTRY_STEMS = {"main", "index", "app", "server", "__init__", "__main__", "manage", "wsgi", "asgi", "run"}
+ENTRY_RANK = 4
+
+JS_IMPORT = re.compile(r"""(?:import\s[^'"]*?from\s*|import\s*\(?\s*|require\s*\(\s*)['"]([^'"]+)['"]""")
+PY_IMPORT = re.compile(r"^\s*(?:from\s+(\.*[\w.]*)\s+import|import\s+([\w.]+))", re.MULTILINE)
+HTML_IMPORT = re.compile(r"""(?:src|href)\s*=\s*['"]([^'"]+)['"]""")
+
+
+def _posix(path: str) -> str:
+    # systemdesign.txt entries may use either separator
+    return posixpath.normpath(path.replace("\\", "/"))
+
+
+def _rank(path: str) -> int:
+    parts = path.lower().split("/")
+    stem, ext = os.path.splitext(parts[-1])
+    if FAMILIES.get(ext) == "style":
+        # Stylesheets only import other stylesheets, write them first (main.css is no entry point)
+        return 0
+    if stem in ENTRY_STEMS:
+        return ENTRY_RANK
+    for names, rank in ROLE_RANKS:
+        if stem in names:
+            return rank
+    for directory in reversed(parts[:-1]):
+        for names, rank in ROLE_RANKS:
+            if directory in names:
+                return rank
+    return OTHER_RANK
+
+
+def _subtree(path: str, rank: int) -> str:
+    """
+    Directory whose files `path` may depend on by rank alone: an entry
+    point's own directory, otherwise its parent's, so sibling packages
+    (models/ next to services/) are in reach but another app of the same
+    project is not.
+    """
+    directory = posixpath.dirname(path)
+    return directory if rank == ENTRY_RANK else posixpath.dirname(directory)
+
+
+def _compatible(dependent: str, dependency: str) -> bool:
+    dependent_family = FAMILIES.get(os.path.splitext(dependent)[1].lower())
+    dependency_family = FAMILIES.get(os.path.splitext(dependency)[1].lower())
+    if dependent_family is None or dependency_family is None:
+        return False
+    if dependent_family == "html":
+        return dependency_family in ("js", "style")
+    return dependent_family == dependency_family
+
+
+def _resolve(specifier: str, importer: str, files: Dict[str, str]) -> List[str]:
+    """Map an import specifier found in `importer` to entries of `files` (posix path -> original)."""
+    candidates = []
+    if importer.endswith(".py"):
+        dots = len(specifier) - len(specifier.lstrip("."))
+        module = specifier.lstrip(".").replace(".", "/")
+        base = posixpath.dirname(importer)
+        for _ in range(max(dots - 1, 0)):
+            base = posixpath.dirname(base)
+        roots = [base] if dots else ["", base]
+        for root in roots:
+            path = posixpath.normpath(posixpath.join(root, module)) if module else root
+            candidates += [path + ".py", posixpath.join(path, "__init__.py")]
+        # Absolute imports can be rooted anywhere in the project (e.g. under src/)
+        if not dots and module:
+            candidates += [path for path in files if path.endswith("/" + module + ".py")]
+    else:
+        if re.match(r"^[a-z]+:|^//", specifier):
+            return []
+        # Bare specifiers are packages in JS, but plain relative paths in HTML/CSS
+        if not specifier.startswith((".", "/")) and FAMILIES.get(posixpath.splitext(importer)[1].lower()) == "js":
+            return []
+        if specifier.startswith("/"):
+            path = posixpath.normpath(specifier.lstrip("/"))
+        else:
+            path = posixpath.normpath(posixpath.join(posixpath.dirname(importer), specifier))
+        candidates.append(path)
+        for ext in FAMILIES:
+            candidates += [path + ext, posixpath.join(path, "index" + ext)]
+    return [files[path] for path in candidates if path in files and path != importer]
+
+
+def extract_imports(path: str, code: str, files: List[str]) -> Set[str]:
+    """Entries of `files` that `code` (the content of `path`) imports."""
+    posix_files = {_posix(file): file for file in files}
+    importer = _posix(path)
+    family = FAMILIES.get(os.path.splitext(importer)[1].lower())
+    if family == "py":
+        specifiers = [match[0] or match[1] for match in PY_IMPORT.findall(code)]
+    elif family == "html":
+        specifiers = HTML_IMPORT.findall(code)
+    elif family in ("js", "style"):
+        specifiers = JS_IMPORT.findall(code) + re.findall(r"""@import\s+['"]([^'"]+)['"]""", code)
+    else:
+        return set()
+    imports = set()
+    for specifier in specifiers:
+        imports.update(_resolve(specifier, importer, posix_files))
+    return imports
+
+
+def build_dependency_graph(files: List[str], project_path: str = None) -> Dict[str, Set[str]]:
+    """
+    Guess which files of a system design each file depends on.
+
+    Files that already exist under `project_path` depend on what they import.
+    For the others, path conventions give the graph: config/types come before
+    models, models before shared modules (api, utils, services...), those
+    before the remaining files and entry points (main, index, app...) last,
+    each only depending on files it could import from the same directory
+    subtree (see `_subtree`).
+    """
+    posix = {file: _posix(file) for file in files}
+    ranks = {file: _rank(posix[file]) for file in files}
+    graph = {file: set() for file in files}
+
+    existing = {}
+    if project_path:
+        for file in files:
+            file_path = os.path.join(project_path, posix[file])
+            if not os.path.isfile(file_path):
+                continue
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    existing[file] = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+
+    for file in files:
+        if file in existing:
+            graph[file] = extract_imports(file, existing[file], files)
+            continue
+        subtree = _subtree(posix[file], ranks[file])
+        for other in files:
+            if other == file or ranks[other] >= ranks[file] or not _compatible(posix[file], posix[other]):
+                continue
+            if subtree and not posix[other].startswith(subtree + "/"):
+                continue
+            graph[file].add(other)
+
+    return graph
+
+
+def dependency_levels(graph: Dict[str, Set[str]]) -> List[List[str]]:
+    """
+    Group files into levels whose dependencies are all in earlier levels,
+    keeping the original order inside a level. Files caught in an import
+    cycle end up together in the last level.
+    """
+    remaining = {file: set(dependencies) & graph.keys() for file, dependencies in graph.items()}
+    levels = []
+    while remaining:
+        level = [file for file, dependencies in remaining.items() if not dependencies]
+        if not level:
+            levels.append(list(remaining))
+            break
+        levels.append(level)
+        for file in level:
+            del remaining[file]
+        for dependencies in remaining.values():
+            dependencies.difference_update(level)
+    return levels
@@ -0,0 +1,138 @@
+import os
+from typing import Callable, Dict, List, Optional, Union
+
+
+class FileBlockParser:
+    """
+    Incremental parser for the code format the coder, patcher and feature
+    agents answer with:
+
+        ~~~
+        File: `src/main.py`:
+        ```py
+        print("hello")
+        ```
+        ~~~
+
+    Feed it response chunks as they stream in; every file is reported to
+    `on_file` as soon as its fenced block closes (or, for files written
+    without a fence, when the next `File:` header arrives). Fences inside a
+    file are kept when they open with a language tag: each tagged opener is
+    matched with a bare ``` before the file's own block closes. A `File:`
+    header inside a block that was left open still starts the next file. A
+    `File:` line with neither backticks nor a trailing colon makes the whole
+    response invalid, as it did for the old per-agent `validate_response`.
+    """
+
+    def __init__(self, on_file: Optional[Callable[[Dict[str, str]], None]] = None):
+        self.on_file = on_file
+        self.files = []
+        self.partial = ""
+        self.current_file = None
+        self.current_code = []
+        self.in_fence = False
+        # Fences opened inside the file's own block, closed by the next bare ```
+        self.nested_fences = 0
+        self.fenced = False
+        self.invalid = False
+
+    def feed(self, chunk: str) -> List[Dict[str, str]]:
+        """Parse a chunk and return the files it completed."""
+        if self.invalid:
+            return []
+        lines = (self.partial + chunk).split("\n")
+        # The last piece has no newline yet, keep it for the next chunk
+        self.partial = lines.pop()
+        completed = []
+        for line in lines:
+            self._parse_line(line.rstrip("\r"), completed)
+        return completed
+
+    def close(self) -> Union[List[Dict[str, str]], bool]:
+        """Finish parsing and return every file, or False if the response was malformed."""
+        completed = []
+        if self.partial and not self.invalid:
+            self._parse_line(self.partial.rstrip("\r"), completed)
+        self.partial = ""
+        if self.invalid:
+            return False
+        self._complete(completed)
+        return self.files
+
+    def _parse_line(self, line: str, completed: list):
+        if self.in_fence and not self.nested_fences and line.startswith("File:"):
+            # The model left the block unclosed: the header still starts the next file
+            self.in_fence = False
+
+        if self.in_fence:
+            if line.startswith("```"):
+                if line.strip("`").strip():
+                    # A tagged fence inside the file (```bash in a README): part of the code
+                    self.nested_fences += 1
+                    self.current_code.append(line)
+                elif self.nested_fences:
+                    self.nested_fences -= 1
+                    self.current_code.append(line)
+                else:
+                    self.in_fence = False
+                    self._complete(completed)
+            else:
+                self.current_code.append(line)
+            return
+
+        if line.startswith("File:"):
+            self._complete(completed)
+            if "`" in line:
+                self.current_file = line.split("`")[1].strip()
+            elif line.endswith(":"):
+                self.current_file = line.split(":")[1].strip()
+            else:
+                print("Error: Line does not contain a backtick (`).")
+                self.invalid = True
+            return
+
+        if line.startswith("```"):
+            if self.current_file:
+                # Text between the header and the fence is not part of the file
+                self.current_code = []
+                self.in_fence = True
+                self.fenced = True
+            return
+
+        if self.current_file and not self.fenced and line.strip() != "~~~":
+            self.current_code.append(line)
+
+    def _complete(self, completed: list):
+        if self.current_file and self.current_code:
+            file = {"file": os.path.normpath(self.current_file), "code": "\n".join(self.current_code)}
+            self.files.append(file)
+            completed.append(file)
+            if self.on_file:
+                self.on_file(file)
+        self.current_file = None
+        self.current_code = []
+        self.nested_fences = 0
+        self.fenced = False
+
+
+def parse_file_blocks(response: str) -> Union[List[Dict[str, str]], bool]:
+    """Parse a complete response, see `FileBlockParser`."""
+    parser = FileBlockParser()
+    parser.feed(response)
+    return parser.close()
+
+
+def stream_file_blocks(llm, prompt: str, project_name: str,
+                       on_file: Optional[Callable[[Dict[str, str]], None]] = None,
+                       retry: bool = False) -> Union[List[Dict[str, str]], bool]:
+    """
+    Run `prompt` through `llm.stream_inference`, reporting files to `on_file`
+    while the response is still being generated. `retry` as for `stream_inference`.
+    """
+    parser = FileBlockParser(on_file)
+    for chunk in llm.stream_inference(prompt, project_name, retry):
+        parser.feed(chunk)
+        if parser.invalid:
+            # The agent retries anyway, don't pay for the rest of the answer
+            break
+    return parser.close()
@@ -2,6 +2,10 @@ import os
 from src.config import Config
 
 class ReadCode:
+    excluded_dirs = ['.git', 'systemdesign', '.idea', '.venv', 'node_modules', 'build', 'coverage', 'venv']
+    excluded_files = ['.placeholder', 'newFile.js', 'favicon.ico', 'README.md', '.gitignore', 'LICENSE']
+    excluded_file_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.ico', '.json', '.svg','.txt']
+
     def __init__(self, project_name: str):
         config = Config()
         project_path = config.get_projects_dir()
@@ -10,14 +14,10 @@ class ReadCode:
 
     def read_directory(self):
         files_list = []
-        excluded_dirs = ['.git', 'systemdesign', '.idea', '.venv', 'node_modules', 'build', 'coverage', 'venv']
-        excluded_files = ['.placeholder', 'newFile.js', 'favicon.ico', 'README.md', '.gitignore', 'LICENSE']
-        excluded_file_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.ico', '.json', '.svg','.txt']
-
         for root, dirs, files in os.walk(self.directory_path):
-            dirs[:] = [d for d in dirs if d not in excluded_dirs]
+            dirs[:] = [d for d in dirs if d not in self.excluded_dirs]
             for file in files:
-                if file in excluded_files or any(file.lower().endswith(ext) for ext in excluded_file_extensions):
+                if not self.is_code_file(file):
                     continue
                 try:
                     file_path = os.path.join(root, file)
@@ -28,6 +28,12 @@ class ReadCode:
                     pass
         return files_list
 
+    @classmethod
+    def is_code_file(cls, file_name: str) -> bool:
+        file_name = os.path.basename(file_name)
+        return file_name not in cls.excluded_files and \
+            not any(file_name.lower().endswith(ext) for ext in cls.excluded_file_extensions)
+
     def code_set_to_markdown(self):
         code_set = self.read_directory()
         markdown = "\n".join([f"{code['filename']}:\n```\n{code['code']}\n```" for code in code_set])
@@ -0,0 +1,120 @@
+import threading
+
+from src.config import Config
+
+
+class BlockedResponse(Exception):
+    """Raised by a client's `stream_inference` when the provider stops a response partway, e.g. for safety."""
+
+
+def _claude_settings(config: Config):
+    return (config.get_claude_api_key(),)
+
+
+def _openai_settings(config: Config):
+    return (config.get_openai_api_key(), config.get_openai_api_base_url())
+
+
+def _gemini_settings(config: Config):
+    return (config.get_gemini_api_key(),)
+
+
+def _mistral_settings(config: Config):
+    return (config.get_mistral_api_key(),)
+
+
+def _groq_settings(config: Config):
+    return (config.get_groq_api_key(),)
+
+
+def _ollama_settings(config: Config):
+    return (config.get_ollama_api_endpoint(),)
+
+
+class ClientRegistry:
+    """
+    Lazily creates one client per provider and reuses it, together with its
+    HTTP connection pool, for every inference.
+
+    Each client is stored with the API key/endpoint it was built from; when
+    those change (e.g. through `/api/settings`) the client is rebuilt on its
+    next use.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = {}
+        # Provider enum -> (client factory, settings the client depends on)
+        self.providers = {}
+
+    def register(self, provider: str, factory, settings):
+        self.providers[provider] = (factory, settings)
+
+    def set_client(self, provider: str, client):
+        """Seed the registry with an already built client."""
+        _, settings = self.providers[provider]
+        with self.lock:
+            self.clients[provider] = (settings(Config()), client)
+
+    def get(self, provider: str):
+        if provider not in self.providers:
+            raise ValueError(f"Model {provider} not supported")
+        factory, settings = self.providers[provider]
+        current = settings(Config())
+
+        cached = self.clients.get(provider)
+        if cached is not None and cached[0] == current:
+            return cached[1]
+
+        with self.lock:
+            cached = self.clients.get(provider)
+            if cached is None or cached[0] != current:
+                cached = (current, factory())
+                self.clients[provider] = cached
+            return cached[1]
+
+    def invalidate(self, provider: str = None):
+        with self.lock:
+            if provider:
+                self.clients.pop(provider, None)
+            else:
+                self.clients.clear()
+
+
+def create_client_registry() -> ClientRegistry:
+    # Provider SDKs are imported on first use so an unused provider costs nothing
+    def claude():
+        from .claude_client import Claude
+        return Claude()
+
+    def openai():
+        from .openai_client import OpenAi
+        return OpenAi()
+
+    def gemini():
+        from .gemini_client import Gemini
+        return Gemini()
+
+    def mistral():
+        from .mistral_client import MistralAi
+        return MistralAi()
+
+    def groq():
+        from .groq_client import Groq
+        return Groq()
+
+    def ollama():
+        from .ollama_client import Ollama
+        return Ollama()
+
+    registry = ClientRegistry()
+    registry.register("CLAUDE", claude, _claude_settings)
+    registry.register("OPENAI", openai, _openai_settings)
+    registry.register("GOOGLE", gemini, _gemini_settings)
+    registry.register("MISTRAL", mistral, _mistral_settings)
+    registry.register("GROQ", groq, _groq_settings)
+    registry.register("OLLAMA", ollama, _ollama_settings)
+    return registry
+
+
+client_registry = create_client_registry()
@@ -2,6 +2,7 @@ import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
 from src.config import Config
+from .client_registry import BlockedResponse
 
 class Gemini:
     def __init__(self):
@@ -42,3 +43,23 @@ class Gemini:
             # Handle the error or return an appropriate message
             return "Error: Unable to generate content Gemini API"
 
+    def stream_inference(self, model_id: str, prompt: str):
+        gen_config = genai.GenerationConfig(temperature=self.config.get_temperature(), top_p=self.config.get_top_p())
+        model = genai.GenerativeModel(model_id, generation_config=gen_config)
+        safety_settings = {
+            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+        }
+
+        response = model.generate_content(prompt.strip(), safety_settings=safety_settings, stream=True)
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Blocked mid-stream, same reporting as the blocking call
+                print("Prompt feedback:", response.prompt_feedback)
+                print("Finish reason:", chunk.candidates[0].finish_reason)
+                print("Safety ratings:", chunk.candidates[0].safety_ratings)
+                raise BlockedResponse(f"Gemini stopped the response: {chunk.candidates[0].finish_reason}")
+            if text:
+                yield text
@@ -1,29 +1,35 @@
+import time
+import uuid
+
 import tiktoken
 from typing import List, Tuple
 
 from src.socket_instance import emit_agent
 from .ollama_client import Ollama
-from .claude_client import Claude
-from .openai_client import OpenAi
-from .gemini_client import Gemini
-from .mistral_client import MistralAi
-from .groq_client import Groq
+from .client_registry import BlockedResponse, client_registry
+from .response_cache import make_cache_key, response_cache
 
-from src.state import AgentState
+from src.token_usage import TokenUsage
 
 from src.config import Config
 from src.logger import Logger
 
 TIKTOKEN_ENC = tiktoken.get_encoding("cl100k_base")
+# Minimum time between two `inference-stream` events of one response
+STREAM_EMIT_INTERVAL = 0.1
 
 ollama = Ollama()
+client_registry.set_client("OLLAMA", ollama)
 logger = Logger()
-agentState = AgentState()
+tokenUsage = TokenUsage()
 
 
 class LLM:
-    def __init__(self, model_id: str = None):
+    def __init__(self, model_id: str = None, agent: str = None, cache: bool = None):
         self.model_id = model_id
+        self.agent = agent
+        # None follows [LLM_CACHE] in config.toml, True/False force the cache on/off for this agent
+        self.cache = cache
         self.log_prompts = Config().get_logging_prompts()
         self.models = {
             "CLAUDE": [
@@ -72,6 +78,7 @@ class LLM:
             #self.models["OLLAMA"] = [(model["name"], model["name"]) for model in ollama.models]
             self.models["OLLAMA"] = [(model["name"].split(":")[0], model["name"]) for model in
                                      ollama.models]
+        self.model_enum_mapping = self.model_id_to_enum_mapping()
 
     def list_models(self) -> dict:
         return self.models
@@ -83,40 +90,115 @@ class LLM:
                 mapping[model_id] = enum_name
         return mapping
 
-    @staticmethod
-    def update_global_token_usage(string: str, project_name: str):
-        token_usage = len(TIKTOKEN_ENC.encode(string))
-        agentState.update_token_usage(project_name, token_usage)
-
-        total = agentState.get_latest_token_usage(project_name) + token_usage
+    def update_global_token_usage(self, project_name: str, prompt_tokens: int, completion_tokens: int):
+        total = tokenUsage.record(project_name, self.model_id, self.agent, prompt_tokens, completion_tokens)
         emit_agent("tokens", {"token_usage": total})
 
-    def inference(self, prompt: str, project_name: str) -> str:
-        self.update_global_token_usage(prompt, project_name)
-
-        model_enum = self.model_id_to_enum_mapping().get(self.model_id)
+    def use_cache(self) -> bool:
+        if self.cache is not None:
+            return self.cache and Config().get_llm_cache_enabled()
+        return response_cache.is_enabled_for(self.agent)
+
+    def stream_inference(self, prompt: str, project_name: str, retry: bool = False):
+        """
+        Yield the response as text chunks while the provider generates it.
+        Chunks are forwarded to the UI as `inference-stream` events and
+        completion tokens are counted as they arrive. Agents pass `retry`
+        when asking again after an unusable response: the cache is skipped
+        and the new response replaces the cached one.
+        """
+        model_enum = self.model_enum_mapping.get(self.model_id)
         print(f"Model: {self.model_id}, Enum: {model_enum}")
         if model_enum is None:
             raise ValueError(f"Model {self.model_id} not supported")
 
-        model_mapping = {
-            "OLLAMA": ollama,
-            "CLAUDE": Claude(),
-            "OPENAI": OpenAi(),
-            "GOOGLE": Gemini(),
-            "MISTRAL": MistralAi(),
-            "GROQ": Groq()
-        }
-
+        output = InferenceStream(project_name, self.agent, self.model_id)
+
+        cache_key = None
+        if self.use_cache():
+            config = Config()
+            cache_key = make_cache_key(self.model_id, prompt, config.get_temperature(), config.get_top_p())
+            if retry:
+                response_cache.count_retry(self.agent)
+                cached = None
+            else:
+                cached = response_cache.get(cache_key, self.agent)
+            if cached is not None:
+                if self.log_prompts:
+                    logger.debug(f"Response (cache): --> {cached}")
+                output.write(cached, 0)
+                output.close()
+                yield cached
+                return
+
+        # Provider clients are built once and reused, see client_registry
+        model = client_registry.get(model_enum)
+        prompt_tokens = len(TIKTOKEN_ENC.encode(prompt))
+        completion_tokens = 0
+        chunks = []
+        completed = False
         try:
-            model = model_mapping[model_enum]
-            response = model.inference(self.model_id, prompt).strip()
-        except KeyError:
-            raise ValueError(f"Model {model_enum} not supported")
-
-        if self.log_prompts:
-            logger.debug(f"Response ({model}): --> {response}")
-
-        self.update_global_token_usage(response, project_name)
-
-        return response
+            try:
+                for chunk in model.stream_inference(self.model_id, prompt):
+                    chunks.append(chunk)
+                    completion_tokens += len(TIKTOKEN_ENC.encode(chunk))
+                    output.write(chunk, completion_tokens)
+                    yield chunk
+                completed = True
+            except BlockedResponse as e:
+                # The agent sees an unusable answer and retries, as with the blocking API;
+                # the partial response is never cached
+                logger.warning(str(e))
+                yield "Error: Unable to generate content"
+        finally:
+            # Also runs when the consumer stops early, the tokens were paid for either way
+            output.close()
+            if self.log_prompts:
+                logger.debug(f"Response ({model}): --> {''.join(chunks)}")
+            self.update_global_token_usage(project_name, prompt_tokens, completion_tokens)
+
+        if completed and cache_key is not None:
+            response_cache.put(cache_key, self.model_id, self.agent, "".join(chunks).strip())
+
+    def inference(self, prompt: str, project_name: str, retry: bool = False) -> str:
+        return "".join(self.stream_inference(prompt, project_name, retry)).strip()
+
+
+class InferenceStream:
+    """
+    Forwards a streamed response to the UI, coalescing chunks into at most one
+    `inference-stream` event per `STREAM_EMIT_INTERVAL`. The last event has
+    `done` set. Every call gets its own `stream` id, so the UI can tell apart
+    the responses of agents generating in parallel.
+    """
+
+    def __init__(self, project_name: str, agent: str, model_id: str):
+        self.project_name = project_name
+        self.agent = agent
+        self.model_id = model_id
+        self.stream_id = uuid.uuid4().hex
+        self.pending = []
+        self.tokens = 0
+        self.last_emit = 0.0
+
+    def write(self, chunk: str, tokens: int):
+        self.pending.append(chunk)
+        self.tokens = tokens
+        if time.monotonic() - self.last_emit >= STREAM_EMIT_INTERVAL:
+            self.flush()
+
+    def flush(self, done: bool = False):
+        self.last_emit = time.monotonic()
+        emit_agent("inference-stream", {
+            "project": self.project_name,
+            "stream": self.stream_id,
+            "agent": self.agent,
+            "model": self.model_id,
+            "data": "".join(self.pending),
+            "tokens": self.tokens,
+            "done": done
+        }, log=False)
+        self.pending = []
+
+    def close(self):
+        self.flush(done=True)
@@ -19,3 +19,14 @@ class MistralAi:
             ]
         )
         return chat_completion.choices[0].message.content
+
+    def stream_inference(self, model_id: str, prompt: str):
+        stream = self.client.chat_stream(
+            model=model_id,
+            messages=[
+                ChatMessage(role="user", content=prompt.strip())
+            ]
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -32,3 +32,17 @@ class Ollama:
             }
         )
         return response['response']
+
+    def stream_inference(self, model_id: str, prompt: str):
+        stream = self.client.generate(
+            model=model_id,
+            prompt=prompt.strip(),
+            options={
+                "temperature": self.config.get_temperature(),
+                "top_p": self.config.get_top_p()
+            },
+            stream=True
+        )
+        for chunk in stream:
+            if chunk['response']:
+                yield chunk['response']
@@ -22,3 +22,18 @@ class OpenAi:
             # temperature=0
         )
         return chat_completion.choices[0].message.content
+
+    def stream_inference(self, model_id: str, prompt: str):
+        stream = self.client.chat.completions.create(
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt.strip(),
+                }
+            ],
+            model=model_id,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import func
+from sqlmodel import Field, Session, SQLModel
+
+from src.config import Config
+from src.database import get_engine
+
+
+class LLMResponseCache(SQLModel, table=True):
+    __tablename__ = "llm_response_cache"
+
+    key: str = Field(primary_key=True)
+    model: str
+    agent: str
+    response: str
+    size: int
+    hits: int = 0
+    last_access: float = Field(index=True)
+
+
+def make_cache_key(model_id: str, prompt: str, temperature, top_p) -> str:
+    """Content address of a request: same model, prompt and sampling settings give the same key."""
+    payload = json.dumps([model_id, temperature, top_p, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    LLM responses keyed by `make_cache_key`, kept in the SQLite DB and evicted
+    least-recently-used first once they exceed `[LLM_CACHE] MAX_SIZE_MB`.
+
+    Agents listed in `[LLM_CACHE] EXCLUDED_AGENTS` (e.g. the coder, which wants
+    fresh samples) always go to the provider unless `LLM(cache=True)` opts in.
+    """
+
+    def __init__(self):
+        self.engine = get_engine()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.retries = 0
+        self.agent_stats = {}
+
+    def is_enabled_for(self, agent: str) -> bool:
+        config = Config()
+        return config.get_llm_cache_enabled() and agent not in config.get_llm_cache_excluded_agents()
+
+    def _count(self, agent: str, hit: bool):
+        with self.lock:
+            stats = self.agent_stats.setdefault(agent or "unknown", {"hits": 0, "misses": 0, "retries": 0})
+            if hit:
+                self.hits += 1
+                stats["hits"] += 1
+            else:
+                self.misses += 1
+                stats["misses"] += 1
+
+    def count_retry(self, agent: str = None):
+        """Record a lookup skipped because the agent is asking again after an unusable response."""
+        with self.lock:
+            self.retries += 1
+            self.agent_stats.setdefault(agent or "unknown", {"hits": 0, "misses": 0, "retries": 0})["retries"] += 1
+
+    def get(self, key: str, agent: str = None) -> Optional[str]:
+        with Session(self.engine) as session:
+            entry = session.get(LLMResponseCache, key)
+            if entry is None:
+                self._count(agent, hit=False)
+                return None
+            entry.hits += 1
+            entry.last_access = time.time()
+            response = entry.response
+            session.commit()
+        self._count(agent, hit=True)
+        return response
+
+    def put(self, key: str, model_id: str, agent: str, response: str):
+        size = len(response.encode("utf-8"))
+        with Session(self.engine) as session:
+            entry = session.get(LLMResponseCache, key)
+            if entry:
+                entry.response = response
+                entry.size = size
+                entry.last_access = time.time()
+            else:
+                session.add(LLMResponseCache(key=key, model=model_id or "unknown", agent=agent or "unknown",
+                                             response=response, size=size, last_access=time.time()))
+            session.commit()
+            self._evict(session)
+
+    def _evict(self, session: Session):
+        max_size = Config().get_llm_cache_max_size_mb() * 1024 * 1024
+        total = session.query(func.coalesce(func.sum(LLMResponseCache.size), 0)).scalar()
+        if total <= max_size:
+            return
+        for entry in session.query(LLMResponseCache).order_by(LLMResponseCache.last_access):
+            session.delete(entry)
+            total -= entry.size
+            if total <= max_size:
+                break
+        session.commit()
+
+    def clear(self):
+        with Session(self.engine) as session:
+            session.query(LLMResponseCache).delete()
+            session.commit()
+
+    def stats(self) -> dict:
+        with Session(self.engine) as session:
+            entries, size = session.query(
+                func.count(LLMResponseCache.key),
+                func.coalesce(func.sum(LLMResponseCache.size), 0)
+            ).one()
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "retries": self.retries,
+                "entries": entries,
+                "size_bytes": size,
+                "agents": {agent: dict(stats) for agent, stats in self.agent_stats.items()}
+            }
+
+
+response_cache = ResponseCache()
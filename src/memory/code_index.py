@@ -0,0 +1,282 @@
+"""
+Retrieval over a project's source files.
+
+Files under `data/projects/<name>` are cut into chunks along top-level
+function and class boundaries (the `ast` for Python, declaration lines for
+other languages), embedded with the `[EMBEDDINGS] MODEL` and searched by
+cosine similarity. Agents get the chunks closest to the request within a
+token budget instead of the whole project. Files written through
+`save_code_to_project` are re-indexed right away; anything else that changed
+on disk is picked up by size and mtime on the next query.
+"""
+import ast
+import os
+import re
+import threading
+from typing import Dict, List
+
+import numpy as np
+import tiktoken
+
+from src.bert.models import model_registry
+from src.config import Config
+from src.filesystem.read_code import ReadCode
+from src.logger import Logger
+from src.memory.vector_index import normalize
+
+logger = Logger()
+
+TIKTOKEN_ENC = tiktoken.get_encoding("cl100k_base")
+
+# Characters of a chunk that are embedded; MiniLM truncates at 256 word pieces anyway
+EMBED_CHARS = 2000
+
+# Top-level declarations in JS/TS, Java, C#, Go, Rust, PHP, Ruby and CSS rules
+DECLARATION = re.compile(
+    r"^(?:export\s+(?:default\s+)?)?(?:async\s+)?"
+    r"(?:function\b|class\b|interface\b|type\b|enum\b|const\b|let\b|var\b|def\b|module\b|fn\b|func\b|"
+    r"pub\b|impl\b|struct\b|trait\b|public\b|private\b|protected\b|internal\b|static\b|abstract\b|final\b)"
+    r"|^[^\s{}()/*#@][^;]*\{\s*$"
+)
+# Comment and decorator lines belong to the declaration below them
+PREFIX = re.compile(r"^\s*(?:@|//|/\*|\*|#)")
+
+
+def _python_boundaries(code: str, max_lines: int) -> List[int]:
+    tree = ast.parse(code)
+    boundaries = []
+
+    def visit(nodes, top_level):
+        for node in nodes:
+            start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) - 1
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) or top_level:
+                boundaries.append(start)
+            # Long classes are cut between their methods
+            if isinstance(node, ast.ClassDef) and node.end_lineno - start > max_lines:
+                visit(node.body, False)
+
+    visit(tree.body, True)
+    return boundaries
+
+
+def _declaration_boundaries(lines: List[str]) -> List[int]:
+    boundaries = []
+    for i, line in enumerate(lines):
+        if not line[:1].isspace() and DECLARATION.match(line):
+            start = i
+            while start > 0 and PREFIX.match(lines[start - 1]) and not lines[start - 1][:1].isspace():
+                start -= 1
+            boundaries.append(start)
+    return boundaries
+
+
+def chunk_code(file: str, code: str, max_lines: int = None) -> List[dict]:
+    """
+    `code` of `file` as `{"file", "start", "end", "text"}` chunks (1-based,
+    inclusive lines) of at most `max_lines` lines, split at definitions.
+    """
+    max_lines = max_lines or Config().get_code_index_chunk_lines()
+    lines = code.splitlines()
+    if not lines:
+        return []
+
+    boundaries = None
+    if file.endswith(".py"):
+        try:
+            boundaries = _python_boundaries(code, max_lines)
+        except (SyntaxError, ValueError):
+            pass
+    if boundaries is None:
+        boundaries = _declaration_boundaries(lines)
+    boundaries = sorted(set(b for b in boundaries if 0 < b < len(lines)) | {0})
+
+    # Neighbouring definitions are packed together up to max_lines, so short
+    # functions and runs of imports don't each become a chunk of their own
+    segments = []
+    for start, end in zip(boundaries, boundaries[1:] + [len(lines)]):
+        if segments and end - segments[-1][0] <= max_lines:
+            segments[-1] = (segments[-1][0], end)
+        else:
+            segments.append((start, end))
+
+    chunks = []
+    for start, end in segments:
+        # Definitions longer than max_lines are cut into windows
+        for window in range(start, end, max_lines):
+            text = "\n".join(lines[window:min(window + max_lines, end)]).strip("\n")
+            if text.strip():
+                chunks.append({"file": file, "start": window + 1, "end": min(window + max_lines, end), "text": text})
+    return chunks
+
+
+def format_chunk(chunk: dict) -> str:
+    return f"{chunk['file']} (lines {chunk['start']}-{chunk['end']}):\n```\n{chunk['text']}\n```"
+
+
+def count_tokens(text: str) -> int:
+    return len(TIKTOKEN_ENC.encode(text, disallowed_special=()))
+
+
+class ProjectIndex:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = threading.Lock()
+        # relative path -> {"stamp": (mtime, size), "chunks": [...], "vectors": array}
+        self.files: Dict[str, dict] = {}
+        self.matrix = None
+        self.chunks = []
+
+    def contains(self, file: str) -> bool:
+        """Whether `file` (relative to the project) resolves inside the project directory."""
+        root = os.path.realpath(self.directory)
+        path = os.path.realpath(os.path.join(root, file))
+        return os.path.commonpath([root, path]) == root and path != root
+
+    def _stamp(self, file: str):
+        stat = os.stat(os.path.join(self.directory, file))
+        return stat.st_mtime_ns, stat.st_size
+
+    def _index_file(self, file: str):
+        path = os.path.join(self.directory, file)
+        try:
+            stamp = self._stamp(file)
+            with open(path, "r", encoding="utf-8") as f:
+                code = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        chunks = chunk_code(file, code)
+        if chunks:
+            # The path is part of the text: "where" is often what the query asks for
+            vectors = normalize(model_registry.embed([f"{c['file']}\n{c['text'][:EMBED_CHARS]}" for c in chunks]))
+        else:
+            vectors = np.empty((0, 0), dtype="float32")
+        return {"stamp": stamp, "chunks": chunks, "vectors": vectors}
+
+    def update(self, files: List[str]):
+        """Re-index `files` (paths relative to the project), dropping those that are gone."""
+        entries = {file: self._index_file(file) for file in files if self.contains(file)}
+        with self.lock:
+            for file, entry in entries.items():
+                if entry is None:
+                    self.files.pop(file, None)
+                else:
+                    self.files[file] = entry
+            self.matrix = None
+
+    def refresh(self):
+        """Bring the index in line with the directory: new, changed and deleted files."""
+        found = {}
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = [d for d in dirs if d not in ReadCode.excluded_dirs]
+            for name in files:
+                if ReadCode.is_code_file(name):
+                    file = os.path.relpath(os.path.join(root, name), self.directory).replace(os.sep, "/")
+                    try:
+                        found[file] = self._stamp(file)
+                    except OSError:
+                        pass
+        with self.lock:
+            changed = [file for file, stamp in found.items()
+                       if file not in self.files or self.files[file]["stamp"] != stamp]
+            removed = [file for file in self.files if file not in found]
+        if changed or removed:
+            logger.info(f"Code index: {len(changed)} changed, {len(removed)} removed in {self.directory}")
+            self.update(changed + removed)
+
+    def search(self, query: str, k: int = None) -> List[dict]:
+        """Chunks by decreasing similarity to `query`, each with its `score`."""
+        with self.lock:
+            if self.matrix is None:
+                entries = [self.files[file] for file in sorted(self.files) if self.files[file]["chunks"]]
+                self.chunks = [chunk for entry in entries for chunk in entry["chunks"]]
+                self.matrix = np.vstack([entry["vectors"] for entry in entries]) if entries else None
+            matrix, chunks = self.matrix, self.chunks
+        if matrix is None:
+            return []
+        scores = matrix @ normalize(model_registry.embed([query]))[0]
+        order = np.argsort(-scores)[:k]
+        return [dict(chunks[i], score=float(scores[i])) for i in order]
+
+
+class CodeIndex:
+    """
+    One `ProjectIndex` per project, built on the first `retrieve` and kept in
+    memory: re-chunking and re-embedding only touches files that changed, and
+    unchanged chunks come out of the embedding cache after a restart.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.projects: Dict[str, ProjectIndex] = {}
+
+    def _get(self, project_name: str, create: bool = True):
+        key = project_name.lower().replace(" ", "-")
+        with self.lock:
+            project = self.projects.get(key)
+            if project is None and create:
+                project = ProjectIndex(os.path.join(Config().get_projects_dir(), key))
+                self.projects[key] = project
+            return project
+
+    def update_files(self, project_name: str, files: List[str]):
+        """
+        Called after agents write `files`. Projects nobody queried yet are
+        left alone, they're indexed on their first `retrieve`.
+        """
+        project = self._get(project_name, create=False)
+        if project is None or not Config().get_code_index_enabled():
+            return
+        files = [os.path.normpath(file).replace(os.sep, "/") for file in files]
+        # Same files as the directory sweep in `refresh`
+        files = [file for file in files if ReadCode.is_code_file(file) and project.contains(file)
+                 and not set(file.split("/")[:-1]) & set(ReadCode.excluded_dirs)]
+        try:
+            project.update(files)
+        except Exception as e:
+            logger.warning(f"Code index update failed for {project_name}: {e}")
+
+    def search(self, project_name: str, query: str, k: int = None) -> List[dict]:
+        project = self._get(project_name)
+        project.refresh()
+        return project.search(query, k)
+
+    def retrieve(self, project_name: str, query: str, token_budget: int = None) -> str:
+        """
+        The chunks of the project most relevant to `query` as markdown, in
+        file and line order, within `token_budget` tokens.
+        """
+        token_budget = token_budget or Config().get_code_index_token_budget()
+        selected = []
+        used = 0
+        for chunk in self.search(project_name, query):
+            tokens = count_tokens(format_chunk(chunk)) + 1
+            if used + tokens > token_budget:
+                # A smaller chunk further down may still fit
+                continue
+            selected.append(chunk)
+            used += tokens
+            if token_budget - used < 16:
+                break
+        selected.sort(key=lambda chunk: (chunk["file"], chunk["start"]))
+        return "\n".join(format_chunk(chunk) for chunk in selected)
+
+
+code_index = CodeIndex()
+
+
+def code_context(project_name: str, query: str, token_budget: int = None) -> str:
+    """
+    Project code for an agent prompt: the whole project when it fits in
+    `token_budget` (`[CODE_INDEX] TOKEN_BUDGET`), the chunks relevant to
+    `query` otherwise.
+    """
+    config = Config()
+    token_budget = token_budget or config.get_code_index_token_budget()
+    code_markdown = ReadCode(project_name).code_set_to_markdown()
+    if not config.get_code_index_enabled() or count_tokens(code_markdown) <= token_budget:
+        return code_markdown
+    try:
+        return code_index.retrieve(project_name, query, token_budget)
+    except Exception as e:
+        logger.warning(f"Code retrieval failed for {project_name}, sending the whole project: {e}")
+        return code_markdown
@@ -1,9 +1,26 @@
-from typing import Optional
-from sqlmodel import Field, Session, SQLModel, create_engine
+import json
+import os
+import threading
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from sqlmodel import Field, Session, SQLModel, select
 from src.config import Config
+from src.database import get_engine
+from src.logger import Logger
+from src.bert.models import model_registry
+from src.memory.vector_index import build_index, export_vectors, index_spec, normalize, remove_ids, tune
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+logger = Logger()
+
+# Rows embedded per batch when the index has to be rebuilt
+REBUILD_BATCH = 1024
+# Zero-copy, read-only mapping of the vectors (older FAISS builds only know IO_FLAG_MMAP)
+MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", getattr(faiss, "IO_FLAG_MMAP", 0))
+
+# Index files are shared by every KnowledgeBase of the process
+_index_lock = threading.Lock()
 
 
 class Knowledge(SQLModel, table=True):
@@ -12,47 +29,284 @@ class Knowledge(SQLModel, table=True):
     contents: str
 
 
+class KnowledgeRevision(SQLModel, table=True):
+    """Single row counting writes to `knowledge`, bumped by triggers."""
+    __tablename__ = "knowledge_revision"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    revision: int = 0
+
+
+# Every insert, update or delete bumps the revision, whoever writes the row
+REVISION_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS knowledge_revision_{event.lower()} AFTER {event} ON knowledge "
+    f"BEGIN UPDATE knowledge_revision SET revision = revision + 1 WHERE id = 1; END"
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+
 class KnowledgeBase:
-    def __init__(self):
-        config = Config()
-        sqlite_path = config.get_sqlite_db()
-        self.engine = create_engine(f"sqlite:///{sqlite_path}")
-        SQLModel.metadata.create_all(self.engine)
-        self.knowledge_entries = self.get_all_knowledge_entries()
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    """
+    Knowledge entries in the DB with a FAISS index over their embeddings.
+
+    The index is keyed by `Knowledge.id`, so adding, updating or deleting an
+    entry only embeds and touches that entry instead of re-encoding the whole
+    table. Its layout (flat, IVF, HNSW, optionally product-quantized) follows
+    `[KNOWLEDGE_BASE]`, see `src.memory.vector_index`; when the config or the
+    corpus size calls for another layout, the stored vectors are re-indexed
+    without embedding anything.
+
+    The index is saved next to the SQLite DB (`knowledge.faiss`) together with
+    the revision of the `knowledge` table it was built from, and memory-mapped
+    on load. Triggers bump that revision on every write to the table, so the
+    index is rebuilt whenever rows were changed behind its back, by another
+    `KnowledgeBase` or anything else.
+    """
+
+    def __init__(self, index_path: str = None):
+        self.engine = get_engine()
+        # The model itself is only loaded once something has to be embedded
+        self.model_name = Config().get_embeddings_model()
+        # Backends give slightly different vectors: an index is only reused with the one that built it
+        self.backend = Config().get_embeddings_backend()
+        self.index_path = index_path or os.path.join(os.path.dirname(Config().get_sqlite_db()), "knowledge.faiss")
+        self.meta_path = self.index_path + ".json"
         self.index = None
-        self.update_index()
+        self.spec = None
+        self.mapped = False
+        # Table revision the in-memory index reflects
+        self.revision = None
+        self._install_triggers()
+        if not self.load_index():
+            self.update_index()
+
+    def _install_triggers(self):
+        with self.engine.begin() as connection:
+            connection.execute(text("INSERT OR IGNORE INTO knowledge_revision (id, revision) VALUES (1, 0)"))
+            for trigger in REVISION_TRIGGERS:
+                connection.execute(text(trigger))
+
+    @staticmethod
+    def _revision(session: Session) -> int:
+        return session.exec(select(KnowledgeRevision.revision).where(KnowledgeRevision.id == 1)).one()
+
+    def corpus_version(self, revision: int = None) -> str:
+        """What the index of the table at `revision` (default: now) depends on."""
+        if revision is None:
+            with Session(self.engine) as session:
+                revision = self._revision(session)
+        return f"{self.model_name}@{self.backend}:cosine:{revision}"
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self.meta_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load_index(self) -> bool:
+        """Map the saved index if it was built from the current corpus."""
+        meta = self._read_meta()
+        if not meta:
+            return False
+        if meta.get("version") != self.corpus_version():
+            logger.info("Knowledge base changed since the index was saved, rebuilding it")
+            return False
+        self.revision = meta["revision"]
+        if meta.get("empty"):
+            self.index = None
+            return True
+        try:
+            with _index_lock:
+                self.index = faiss.read_index(self.index_path, MMAP_FLAG)
+        except RuntimeError as e:
+            logger.warning(f"Could not load the knowledge index: {e}")
+            return False
+        self.spec = meta.get("spec")
+        self.mapped = True
+        tune(self.index)
+        if self._check_spec():
+            self.save_index()
+        return True
+
+    def save_index(self):
+        """Save the index under the revision it was built from, unless a newer one is already saved."""
+        with _index_lock:
+            saved = self._read_meta()
+            if saved.get("version") == self.corpus_version(saved.get("revision")) and \
+                    saved.get("revision", -1) > self.revision:
+                # Another KnowledgeBase saved a later state of the table
+                return
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            if self.index is not None:
+                faiss.write_index(self.index, self.index_path + ".tmp")
+                os.replace(self.index_path + ".tmp", self.index_path)
+            with open(self.meta_path + ".tmp", "w") as f:
+                json.dump({"version": self.corpus_version(self.revision), "revision": self.revision,
+                           "spec": self.spec, "empty": self.index is None}, f)
+            os.replace(self.meta_path + ".tmp", self.meta_path)
+
+    def _commit(self, session: Session) -> Tuple[int, int]:
+        """Commit a write, returning the table revision before and after it."""
+        rows = len(session.new) + len(session.deleted) + sum(session.is_modified(entry) for entry in session.dirty)
+        session.flush()
+        # Read inside the write transaction, where nobody else can bump it: each row bumped it once
+        after = self._revision(session)
+        session.commit()
+        return after - rows, after
+
+    def _save_after_write(self, before: int, after: int):
+        """
+        Save the index once a write going from revision `before` to `after`
+        is applied to it. If the table had changed since the index was built,
+        the index misses those rows: load a saved one that has them or rebuild.
+        """
+        if before != self.revision:
+            logger.info("Knowledge base was changed by another writer, reloading the index")
+            if not self.load_index():
+                self.update_index()
+            return
+        self.revision = after
+        self.save_index()
 
-    def add_knowledge(self, tag: str, contents: str):
-        knowledge = Knowledge(tag=tag, contents=contents)
+    def _writable(self):
+        # A memory-mapped index can't grow or shrink, read an owned copy before changing it
+        if self.mapped:
+            with _index_lock:
+                self.index = faiss.read_index(self.index_path)
+            tune(self.index)
+            self.mapped = False
+
+    def _check_spec(self) -> bool:
+        """Re-index the stored vectors if the layout no longer fits the config or corpus size."""
+        spec = index_spec(self.index.ntotal)
+        if spec == self.spec:
+            return False
+        if self.spec and self.spec.endswith("+pq") and not spec.endswith("+pq"):
+            # PQ codes only decode to approximations, embed the corpus again for an exact index
+            self.update_index()
+            return True
+        logger.info(f"Re-indexing {self.index.ntotal} knowledge entries from {self.spec} to {spec}")
+        ids, vectors = export_vectors(self.index)
+        self.index = build_index(spec, self.index.d, ids, normalize(vectors))
+        self.spec = spec
+        self.mapped = False
+        return True
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return normalize(model_registry.embed(texts))
+
+    def _index_add(self, entries: List[Knowledge]):
+        if not entries:
+            return
+        self._writable()
+        embeddings = self._encode([entry.contents for entry in entries])
+        ids = np.array([entry.id for entry in entries], dtype="int64")
+        if self.index is None:
+            self.spec = index_spec(len(entries))
+            self.index = build_index(self.spec, embeddings.shape[1], ids, embeddings)
+        else:
+            self.index.add_with_ids(embeddings, ids)
+            self._check_spec()
+
+    def _index_remove(self, knowledge_id: int):
+        if self.index is not None:
+            self._writable()
+            self.index = remove_ids(self.index, np.array([knowledge_id], dtype="int64"))
+
+    def add_knowledge(self, tag: str, contents: str) -> Knowledge:
+        return self.add_knowledge_many([(tag, contents)])[0]
+
+    def add_knowledge_many(self, items: List[Tuple[str, str]]) -> List[Knowledge]:
+        """Store `(tag, contents)` pairs in one transaction and embed them in one batch."""
+        entries = [Knowledge(tag=tag, contents=contents) for tag, contents in items]
+        if not entries:
+            return entries
         with Session(self.engine) as session:
-            session.add(knowledge)
-            session.commit()
-            session.refresh(knowledge)  # Reload the object from the session
-        self.knowledge_entries.append(knowledge)
-        self.update_index()
+            session.add_all(entries)
+            before, after = self._commit(session)
+            for entry in entries:
+                session.refresh(entry)  # Reload the object from the session
+        self._index_add(entries)
+        self._save_after_write(before, after)
+        return entries
+
+    def update_knowledge(self, knowledge_id: int, contents: str, tag: str = None) -> Optional[Knowledge]:
+        with Session(self.engine) as session:
+            entry = session.get(Knowledge, knowledge_id)
+            if entry is None:
+                return None
+            entry.contents = contents
+            if tag is not None:
+                entry.tag = tag
+            before, after = self._commit(session)
+            session.refresh(entry)
+        self._index_remove(knowledge_id)
+        self._index_add([entry])
+        self._save_after_write(before, after)
+        return entry
+
+    def delete_knowledge(self, knowledge_id: int) -> bool:
+        with Session(self.engine) as session:
+            entry = session.get(Knowledge, knowledge_id)
+            if entry is None:
+                return False
+            session.delete(entry)
+            before, after = self._commit(session)
+        self._index_remove(knowledge_id)
+        self._save_after_write(before, after)
+        return True
 
     def update_index(self):
-        if self.knowledge_entries:
-            embeddings = self.model.encode([entry.contents for entry in self.knowledge_entries])
-            self.index = faiss.IndexFlatL2(embeddings.shape[1])
-            self.index.add(np.array(embeddings))
-        else:
-            self.index = None
+        """Rebuild the whole index from the DB and save it."""
+        self.index = None
+        self.spec = None
+        self.mapped = False
+        with Session(self.engine) as session:
+            # Read before the rows: a write landing in between makes the index look
+            # older than it is, which costs a rebuild but never a missing row
+            self.revision = self._revision(session)
+            query = session.query(Knowledge).order_by(Knowledge.id).yield_per(REBUILD_BATCH)
+            batch = []
+            for entry in query:
+                batch.append(entry)
+                if len(batch) == REBUILD_BATCH:
+                    self._index_add(batch)
+                    batch = []
+            self._index_add(batch)
+        self.save_index()
+
+    def search(self, query: str, k: int = 5, min_score: float = None) -> List[dict]:
+        """
+        The `k` entries closest to `query`, best first, as
+        `{"id", "tag", "contents", "score"}` with the cosine similarity as score.
+        Entries scoring below `min_score` are left out.
+        """
+        if self.index is None or not self.index.ntotal:
+            return []
+        scores, ids = self.index.search(self._encode([query]), k)
+        hits = [(int(knowledge_id), float(score)) for knowledge_id, score in zip(ids[0], scores[0])
+                if knowledge_id >= 0 and (min_score is None or score >= min_score)]
+        if not hits:
+            return []
+        with Session(self.engine) as session:
+            entries = {
+                entry.id: entry
+                for entry in session.exec(select(Knowledge).where(Knowledge.id.in_([i for i, _ in hits])))
+            }
+        return [
+            {"id": knowledge_id, "tag": entries[knowledge_id].tag, "contents": entries[knowledge_id].contents,
+             "score": score}
+            for knowledge_id, score in hits if knowledge_id in entries
+        ]
 
     def get_knowledge(self, query: str) -> Optional[str]:
-        if self.index:
-            return self.search_knowledge(query)
-        else:
-            return None
+        """Best entry for `query`, if it scores at least `[KNOWLEDGE_BASE] MIN_SCORE`."""
+        hits = self.search(query, 1, Config().get_knowledge_min_score())
+        return hits[0]["contents"] if hits else None
 
     def search_knowledge(self, query: str) -> Optional[str]:
-        query_embedding = self.model.encode([query])[0]
-        _, indices = self.index.search(np.array([query_embedding]), 1)
-        if indices.size > 0:
-            return self.knowledge_entries[indices[0][0]].contents
-        else:
-            return None
+        hits = self.search(query, 1)
+        return hits[0]["contents"] if hits else None
 
     def get_all_knowledge_entries(self):
         with Session(self.engine) as session:
@@ -1,17 +1,18 @@
 """
 Vector Search for Code Docs + Docs Loading
 """
-import requests
+import httpx
 
 from bs4 import BeautifulSoup
 
+from src.browser.scrape_cache import get_scrape_cache
+
 
 def scrape_website(url):
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for failed requests
-        return clean_and_preprocess_text(response.content)
-    except requests.exceptions.RequestException as e:
+        # Served from the scrape cache while fresh, revalidated with ETag/Last-Modified after
+        return get_scrape_cache().fetch(url, clean_and_preprocess_text)
+    except httpx.HTTPError as e:
         print(f"Error scraping website: {e}")
         return ""
 
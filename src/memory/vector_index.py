@@ -0,0 +1,145 @@
+"""
+FAISS index types for the knowledge base.
+
+Vectors are L2-normalized and compared by inner product, so scores are cosine
+similarities. `[KNOWLEDGE_BASE] INDEX_TYPE` picks the structure:
+
+- "flat": exact search, linear in the number of entries.
+- "ivf": inverted lists over `4 * sqrt(n)` k-means cells, `NPROBE` of which are
+  scanned per query.
+- "hnsw": graph search, no training, `EF_SEARCH` candidates per query.
+
+`PQ = "true"` stores product-quantized codes (`PQ_M` bytes per vector instead
+of 4 per dimension) with "flat" and "ivf". IVF centroids and PQ codebooks are
+trained on the corpus itself, so below `MIN_TRAIN_ENTRIES` those fall back to
+an exact flat index and switch over once the corpus is large enough.
+"""
+import math
+from typing import Tuple
+
+import faiss
+import numpy as np
+
+from src.config import Config
+from src.logger import Logger
+
+logger = Logger()
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+# Enough points for faiss to train 256 PQ centroids (39 per centroid) or IVF cells
+MIN_TRAIN_ENTRIES = 10000
+PQ_BITS = 8
+# k-means on more points per cell barely moves the centroids but costs linear time
+TRAIN_POINTS_PER_LIST = 64
+
+
+def normalize(vectors) -> np.ndarray:
+    vectors = np.array(vectors, dtype="float32", order="C", ndmin=2)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def _training_sample(vectors: np.ndarray, size: int) -> np.ndarray:
+    if len(vectors) <= size:
+        return vectors
+    rows = np.random.default_rng(0).choice(len(vectors), size, replace=False)
+    return vectors[np.sort(rows)]
+
+
+def index_spec(count: int) -> str:
+    """Index layout for a corpus of `count` entries under the current config, e.g. "ivf+pq"."""
+    config = Config()
+    kind = config.get_knowledge_index_type()
+    if kind not in INDEX_TYPES:
+        logger.warning(f"Unknown knowledge index type '{kind}', using flat")
+        kind = "flat"
+    # HNSW can't delete, deletes rebuild it from its own vectors: keep those exact
+    pq = config.get_knowledge_index_pq() and kind != "hnsw"
+    if (kind == "ivf" or pq) and count < MIN_TRAIN_ENTRIES:
+        return "flat"
+    return kind + "+pq" if pq else kind
+
+
+def _pq_m(dim: int) -> int:
+    m = Config().get_knowledge_pq_m()
+    # Sub-quantizers have to split the vector evenly
+    while dim % m:
+        m -= 1
+    return m
+
+
+def tune(index):
+    """Apply the query-time settings, which aren't part of the saved index."""
+    config = Config()
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(config.get_knowledge_ivf_nprobe(), ivf.nlist)
+    elif isinstance(index, faiss.IndexIDMap2):
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = config.get_knowledge_hnsw_ef_search()
+
+
+def build_index(spec: str, dim: int, ids: np.ndarray, vectors: np.ndarray):
+    """New index of layout `spec` holding `vectors` (normalized) under `ids`, trained on them if needed."""
+    config = Config()
+    metric = faiss.METRIC_INNER_PRODUCT
+    if spec.startswith("ivf"):
+        nlist = max(1, min(int(4 * math.sqrt(len(vectors))), len(vectors) // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+        if spec.endswith("+pq"):
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_m(dim), PQ_BITS, metric)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+        index.train(_training_sample(vectors, TRAIN_POINTS_PER_LIST * nlist))
+        # Lets remove_ids and reconstruct find entries by id
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    elif spec == "hnsw":
+        index = faiss.IndexIDMap2(faiss.IndexHNSWFlat(dim, config.get_knowledge_hnsw_m(), metric))
+    elif spec == "flat+pq":
+        inner = faiss.IndexPQ(dim, _pq_m(dim), PQ_BITS, metric)
+        inner.train(vectors)
+        index = faiss.IndexIDMap2(inner)
+    else:
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+    tune(index)
+    if len(ids):
+        index.add_with_ids(vectors, ids)
+    return index
+
+
+def index_kind(index) -> str:
+    """Layout of an existing index, as returned by `index_spec`."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return "ivf+pq" if isinstance(ivf, faiss.IndexIVFPQ) else "ivf"
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat+pq" if isinstance(inner, faiss.IndexPQ) else "flat"
+
+
+def export_vectors(index) -> Tuple[np.ndarray, np.ndarray]:
+    """All `(ids, vectors)` of an index; decoded approximations for PQ layouts."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        lists = ivf.invlists
+        ids = [faiss.rev_swig_ptr(lists.get_ids(i), lists.list_size(i)).copy()
+               for i in range(ivf.nlist) if lists.list_size(i)]
+        ids = np.concatenate(ids) if ids else np.empty(0, dtype="int64")
+        vectors = ivf.reconstruct_batch(ids) if len(ids) else np.empty((0, ivf.d), dtype="float32")
+        return ids, vectors
+    ids = faiss.vector_to_array(index.id_map).astype("int64")
+    vectors = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+    return ids, vectors
+
+
+def remove_ids(index, ids: np.ndarray):
+    """`index` without `ids`: removed in place where the layout allows it, rebuilt otherwise."""
+    try:
+        index.remove_ids(ids)
+        return index
+    except RuntimeError:
+        all_ids, vectors = export_vectors(index)
+        keep = ~np.isin(all_ids, ids)
+        return build_index(index_kind(index), index.d, all_ids[keep], vectors[keep])
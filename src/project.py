@@ -1,13 +1,19 @@
 import os
 import json
+import threading
 
 import zipfile
 from datetime import datetime
 from typing import Optional
 from src.socket_instance import emit_agent
-from sqlmodel import Field, Session, SQLModel, create_engine
+from sqlmodel import Field, Session, SQLModel
+from src.database import get_engine
 from src.config import Config
 
+# The message stack is a JSON column rewritten in full on every message, so
+# concurrent appends (coder workers saving files at once) have to take turns
+_message_lock = threading.Lock()
+
 
 class Projects(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -19,10 +25,8 @@ class Projects(SQLModel, table=True):
 class ProjectManager:
     def __init__(self):
         config = Config()
-        sqlite_path = config.get_sqlite_db()
         self.project_path = config.get_projects_dir()
-        self.engine = create_engine(f"sqlite:///{sqlite_path}")
-        SQLModel.metadata.create_all(self.engine)
+        self.engine = get_engine()
 
     def new_message(self, message: str):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -64,7 +68,7 @@ class ProjectManager:
                     os.rmdir(project_dir)
 
     def add_message_to_project(self, project: str, message: dict):
-        with Session(self.engine) as session:
+        with _message_lock, Session(self.engine) as session:
             project_state = session.query(Projects).filter_by(project=project).first()
             if project_state:
                 message_stack = json.loads(project_state.message_stack_json)
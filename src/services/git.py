@@ -13,7 +13,7 @@ PROMPT1 = open("src/services/prompt1.jinja2").read().strip()
 class Git:
 
     def __init__(self, path, base_model: str):
-        self.llm = LLM(model_id=base_model)
+        self.llm = LLM(model_id=base_model, agent="git")
         try:
             self.repo = GitPython.Repo(path)
         except GitPython.exc.InvalidGitRepositoryError:
@@ -79,7 +79,7 @@ class Git:
         self.repo.index.add("*")
         self.repo.index.commit(message)
 
-    def generate_commit_message(self, project_name, conversation, code_markdown):
+    def generate_commit_message(self, project_name, conversation, code_markdown, retry=False):
         # Get the code diff
         try:
             code_diff = self.repo.git.diff()
@@ -87,14 +87,14 @@ class Git:
             code_diff = ""
 
         prompt = self.render(conversation, code_markdown, code_diff)
-        response = self.llm.inference(prompt, project_name)
+        response = self.llm.inference(prompt, project_name, retry=retry)
         print(response)
 
         valid_response = self.validate_response(response)
 
         while not valid_response:
             print("Invalid response from the model, trying again...")
-            return self.generate_commit_message(project_name, conversation, code_markdown)
+            return self.generate_commit_message(project_name, conversation, code_markdown, retry=True)
 
         return valid_response
 
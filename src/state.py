@@ -1,13 +1,24 @@
+import atexit
 import json
 import os
+import threading
 from datetime import datetime
 from typing import Optional
-from sqlmodel import Field, Session, SQLModel, create_engine
-from src.socket_instance import emit_agent
+from sqlalchemy import Index
+from sqlmodel import Field, Session, SQLModel
 from src.config import Config
+from src.database import get_engine
+from src.logger import Logger
+from src.socket_instance import emit_agent
+from src.token_usage import TokenUsageCounter
 
 
 class AgentStateModel(SQLModel, table=True):
+    """Legacy storage: the whole state stack serialized in a single row per project.
+
+    Only read by `AgentState.migrate_legacy_state`, new writes go to
+    `AgentStateEntry` and `AgentLatestState`.
+    """
     __tablename__ = "agent_state"
 
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -15,12 +26,200 @@ class AgentStateModel(SQLModel, table=True):
     state_stack_json: str
 
 
+class AgentStateEntry(SQLModel, table=True):
+    """
+    One row per state pushed on a project's stack, ordered by `seq`.
+    `version` is the project version at which the row was last written.
+    """
+    __tablename__ = "agent_state_entry"
+    __table_args__ = (
+        Index("ix_agent_state_entry_project_seq", "project", "seq", unique=True),
+        Index("ix_agent_state_entry_project_version", "project", "version"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    project: str
+    seq: int
+    version: int = 0
+    state_json: str
+
+
+class AgentLatestState(SQLModel, table=True):
+    """Copy of the top of each project's stack so reads never touch the log."""
+    __tablename__ = "agent_state_latest"
+
+    project: str = Field(primary_key=True)
+    seq: int
+    version: int = 0
+    state_json: str
+
+
+# Serializes writers so two threads never allocate the same `seq`
+_write_lock = threading.RLock()
+_legacy_migrated = False
+
+_state_cache = None
+_state_cache_lock = threading.Lock()
+
+
+def _store_state_records(session: Session, project: str, records: dict, latest: dict):
+    """
+    Upsert `records` ({seq: (version, state_json)}) into the log and point the
+    latest-state row at `latest`. Does not commit.
+    """
+    existing = {
+        entry.seq: entry for entry in session.query(AgentStateEntry).filter(
+            AgentStateEntry.project == project,
+            AgentStateEntry.seq.in_(list(records))
+        )
+    }
+    for seq, (version, state_json) in records.items():
+        entry = existing.get(seq)
+        if entry:
+            entry.version = version
+            entry.state_json = state_json
+        else:
+            session.add(AgentStateEntry(project=project, seq=seq, version=version, state_json=state_json))
+
+    latest_row = session.get(AgentLatestState, project)
+    if latest_row:
+        latest_row.seq = latest["seq"]
+        latest_row.version = latest["version"]
+        latest_row.state_json = latest["state_json"]
+    else:
+        session.add(AgentLatestState(project=project, **latest))
+
+
+class StateWriteBehind:
+    """
+    Optional in-memory front for the agent state log, enabled with
+    `[STATE] WRITE_BEHIND = "true"` in config.toml.
+
+    The latest state of every project is served from RAM and written entries
+    are queued, then flushed for all dirty projects in one transaction every
+    `flush_interval` seconds, when `max_pending` entries are queued, and at exit.
+    A crash therefore loses at most `flush_interval` seconds or `max_pending`
+    entries of state. Agent start/stop/completion is always written through.
+    """
+
+    def __init__(self, engine, flush_interval: float, max_pending: int):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.lock = threading.RLock()
+        self.latest = {}
+        self.pending = {}
+        self.pending_count = 0
+        self.logger = Logger()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="agent-state-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def get_latest(self, project: str, loader):
+        with self.lock:
+            if project not in self.latest:
+                self.latest[project] = loader(project)
+            return self.latest[project]
+
+    def put(self, project: str, latest: dict):
+        with self.lock:
+            self.latest[project] = latest
+            records = self.pending.setdefault(project, {})
+            if latest["seq"] not in records:
+                self.pending_count += 1
+            records[latest["seq"]] = (latest["version"], latest["state_json"])
+            if self.pending_count >= self.max_pending:
+                self.flush()
+
+    def forget(self, project: str):
+        with self.lock:
+            self.latest.pop(project, None)
+            self.pending_count -= len(self.pending.pop(project, {}))
+
+    def flush(self, project: str = None):
+        """Write the queued entries of `project` (or of every project) in one transaction."""
+        with self.lock:
+            projects = [project] if project else list(self.pending)
+            projects = [name for name in projects if self.pending.get(name)]
+            if not projects:
+                return
+            try:
+                with Session(self.engine) as session:
+                    for name in projects:
+                        _store_state_records(session, name, self.pending[name], self.latest[name])
+                    session.commit()
+            except Exception as e:
+                # Keep the queue, the next flush retries it
+                self.logger.error(f"Failed to flush agent state: {e}")
+                return
+            for name in projects:
+                self.pending_count -= len(self.pending.pop(name))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+
+def get_state_cache(engine):
+    """Return the process-wide write-behind cache, or None when it is disabled."""
+    global _state_cache
+    config = Config()
+    if not config.get_state_write_behind():
+        return None
+    with _state_cache_lock:
+        if _state_cache is None:
+            _state_cache = StateWriteBehind(
+                engine,
+                flush_interval=config.get_state_flush_interval(),
+                max_pending=config.get_state_max_pending()
+            )
+    return _state_cache
+
+
 class AgentState:
     def __init__(self):
-        config = Config()
-        sqlite_path = config.get_sqlite_db()
-        self.engine = create_engine(f"sqlite:///{sqlite_path}")
-        SQLModel.metadata.create_all(self.engine)
+        self.engine = get_engine()
+        self.migrate_legacy_state()
+        self.cache = get_state_cache(self.engine)
+
+    def migrate_legacy_state(self):
+        """
+        Move every stack stored in the legacy `agent_state` table into the
+        append-only log. Runs once per process; migrated rows are deleted so
+        the migration is idempotent across restarts.
+
+        Token totals used to be kept in the state too: projects without a
+        `TokenUsageCounter` yet start from their last `token_usage`. The old
+        total wasn't split, it is counted as prompt tokens.
+        """
+        global _legacy_migrated
+        if _legacy_migrated:
+            return
+        with _write_lock:
+            if _legacy_migrated:
+                return
+            with Session(self.engine) as session:
+                for legacy in session.query(AgentStateModel).all():
+                    state_stack = json.loads(legacy.state_stack_json)
+                    if state_stack and not session.get(AgentLatestState, legacy.project):
+                        for seq, state in enumerate(state_stack):
+                            session.add(AgentStateEntry(project=legacy.project, seq=seq, version=1,
+                                                        state_json=json.dumps(state)))
+                        session.add(AgentLatestState(project=legacy.project, seq=len(state_stack) - 1,
+                                                     version=1, state_json=json.dumps(state_stack[-1])))
+                    session.delete(legacy)
+                session.flush()
+                for latest in session.query(AgentLatestState).all():
+                    legacy_tokens = json.loads(latest.state_json).get("token_usage") or 0
+                    if legacy_tokens and not session.get(TokenUsageCounter, (latest.project, "")):
+                        session.add(TokenUsageCounter(project=latest.project, run_id="", prompt_tokens=legacy_tokens))
+                session.commit()
+            _legacy_migrated = True
 
     def new_state(self):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -44,130 +243,146 @@ class AgentState:
             "timestamp": timestamp
         }
 
-    def delete_state(self, project: str):
+    def _load_latest(self, project: str):
         with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
+            latest = session.get(AgentLatestState, project)
+            if latest:
+                return {"seq": latest.seq, "version": latest.version, "state_json": latest.state_json}
+            return None
+
+    def _get_latest(self, project: str):
+        if self.cache:
+            return self.cache.get_latest(project, self._load_latest)
+        return self._load_latest(project)
 
-            if agent_state:
-                session.delete(agent_state)
+    def _save_state(self, project: str, state: dict, append: bool, write_through: bool = False):
+        """
+        Push `state` on the stack (`append`) or write it over the top entry, and
+        return `(version, entries)` for `emit_state_delta`. Must hold `_write_lock`.
+        """
+        latest = self._get_latest(project)
+        if latest is None:
+            seq, version = 0, 1
+        else:
+            seq = latest["seq"] + 1 if append else latest["seq"]
+            version = latest["version"] + 1
+        new_latest = {"seq": seq, "version": version, "state_json": json.dumps(state)}
+
+        if self.cache:
+            self.cache.put(project, new_latest)
+            if write_through:
+                self.cache.flush(project)
+        else:
+            with Session(self.engine) as session:
+                records = {seq: (version, new_latest["state_json"])}
+                _store_state_records(session, project, records, new_latest)
                 session.commit()
+        return version, [{"seq": seq, "state": state}]
 
-    def add_to_current_state(self, project: str, state: dict):
+    def emit_state_delta(self, project: str, version: int, entries: list):
+        """
+        Push the entries written at `version` to the frontend. Every write bumps
+        the project version by exactly one, so a client that sees a gap knows it
+        missed an update and should resync through `get_state_delta`.
+        """
+        emit_agent("agent-state", {
+            "project": project,
+            "version": version,
+            "entries": entries
+        })
+
+    def get_state_version(self, project: str) -> int:
+        latest = self._get_latest(project)
+        return latest["version"] if latest else 0
+
+    def get_state_delta(self, project: str, since_version: int = 0):
+        """
+        Return `(version, entries)` with every entry written after `since_version`.
+        A client ahead of the server (e.g. after the project state was deleted)
+        gets the full stack back.
+        """
+        if self.cache:
+            self.cache.flush(project)
         with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                state_stack = json.loads(agent_state.state_stack_json)
-                state_stack.append(state)
-                agent_state.state_stack_json = json.dumps(state_stack)
-                session.commit()
-            else:
-                state_stack = [state]
-                agent_state = AgentStateModel(project=project, state_stack_json=json.dumps(state_stack))
-                session.add(agent_state)
+            latest = session.get(AgentLatestState, project)
+            if not latest:
+                return 0, []
+            if since_version > latest.version:
+                since_version = 0
+            entries = session.query(AgentStateEntry).filter(
+                AgentStateEntry.project == project,
+                AgentStateEntry.version > since_version
+            ).order_by(AgentStateEntry.seq).all()
+            return latest.version, [{"seq": entry.seq, "state": json.loads(entry.state_json)} for entry in entries]
+
+    def delete_state(self, project: str):
+        with _write_lock:
+            if self.cache:
+                self.cache.forget(project)
+            with Session(self.engine) as session:
+                session.query(AgentStateEntry).filter_by(project=project).delete()
+                session.query(AgentLatestState).filter_by(project=project).delete()
                 session.commit()
-            # if projects == selectedprojects:
-            emit_agent("agent-state", state_stack)
-            ######
+
+    def add_to_current_state(self, project: str, state: dict):
+        with _write_lock:
+            version, entries = self._save_state(project, state, append=True)
+        # if projects == selectedprojects:
+        self.emit_state_delta(project, version, entries)
+        ######
+
     def get_current_state(self, project: str):
+        if self.cache:
+            self.cache.flush(project)
         with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                return json.loads(agent_state.state_stack_json)
+            entries = session.query(AgentStateEntry).filter_by(project=project).order_by(AgentStateEntry.seq).all()
+            if entries:
+                return [json.loads(entry.state_json) for entry in entries]
             return None
 
     def update_latest_state(self, project: str, state: dict):
-        with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                state_stack = json.loads(agent_state.state_stack_json)
-                state_stack[-1] = state
-                agent_state.state_stack_json = json.dumps(state_stack)
-                session.commit()
-            else:
-                state_stack = [state]
-                agent_state = AgentStateModel(project=project, state_stack_json=json.dumps(state_stack))
-                session.add(agent_state)
-                session.commit()
-            emit_agent("agent-state", state_stack)
+        with _write_lock:
+            version, entries = self._save_state(project, state, append=False)
+        self.emit_state_delta(project, version, entries)
 
     def get_latest_state(self, project: str):
         if not project:
             # If no project is selected, return None immediately
             return None
-        with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                return json.loads(agent_state.state_stack_json)[-1]
-            return None
+        latest = self._get_latest(project)
+        if latest:
+            return json.loads(latest["state_json"])
+        return None
 
     def set_agent_active(self, project: str, is_active: bool):
-        with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                state_stack = json.loads(agent_state.state_stack_json)
-                state_stack[-1]["agent_is_active"] = is_active
-                agent_state.state_stack_json = json.dumps(state_stack)
-                session.commit()
-            else:
-                state_stack = [self.new_state()]
-                state_stack[-1]["agent_is_active"] = is_active
-                agent_state = AgentStateModel(project=project, state_stack_json=json.dumps(state_stack))
-                session.add(agent_state)
-                session.commit()
-            emit_agent("agent-state", state_stack)
+        with _write_lock:
+            state = self.get_latest_state(project) or self.new_state()
+            state["agent_is_active"] = is_active
+            version, entries = self._save_state(project, state, append=False, write_through=True)
+        self.emit_state_delta(project, version, entries)
 
     def is_agent_active(self, project: str):
-        with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                return json.loads(agent_state.state_stack_json)[-1]["agent_is_active"]
-            return None
+        state = self.get_latest_state(project)
+        if state:
+            return state["agent_is_active"]
+        return None
 
     def set_agent_completed(self, project: str, is_completed: bool):
-        with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                state_stack = json.loads(agent_state.state_stack_json)
-                state_stack[-1]["internal_monologue"] = "Agent has completed the task."
-                state_stack[-1]["completed"] = is_completed
-                agent_state.state_stack_json = json.dumps(state_stack)
-                session.commit()
+        with _write_lock:
+            state = self.get_latest_state(project)
+            if state:
+                state["internal_monologue"] = "Agent has completed the task."
             else:
-                state_stack = [self.new_state()]
-                state_stack[-1]["completed"] = is_completed
-                agent_state = AgentStateModel(project=project, state_stack_json=json.dumps(state_stack))
-                session.add(agent_state)
-                session.commit()
-            emit_agent("agent-state", state_stack)
+                state = self.new_state()
+            state["completed"] = is_completed
+            version, entries = self._save_state(project, state, append=False, write_through=True)
+        self.emit_state_delta(project, version, entries)
 
     def is_agent_completed(self, project: str):
-        with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                return json.loads(agent_state.state_stack_json)[-1]["completed"]
-            return None
-
-    def update_token_usage(self, project: str, token_usage: int):
-        with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                state_stack = json.loads(agent_state.state_stack_json)
-                state_stack[-1]["token_usage"] += token_usage
-                agent_state.state_stack_json = json.dumps(state_stack)
-                session.commit()
-            else:
-                state_stack = [self.new_state()]
-                state_stack[-1]["token_usage"] = token_usage
-                agent_state = AgentStateModel(project=project, state_stack_json=json.dumps(state_stack))
-                session.add(agent_state)
-                session.commit()
-
-    def get_latest_token_usage(self, project: str):
-        with Session(self.engine) as session:
-            agent_state = session.query(AgentStateModel).filter_by(project=project).first()
-            if agent_state:
-                return json.loads(agent_state.state_stack_json)[-1]["token_usage"]
-            return 0
+        state = self.get_latest_state(project)
+        if state:
+            return state["completed"]
+        return None
 
     def get_project_files1(self, project_name: str):
         if not project_name:
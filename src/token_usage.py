@@ -0,0 +1,149 @@
+import threading
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Field, Session, SQLModel
+
+from src.database import get_engine
+
+
+class TokenUsageCall(SQLModel, table=True):
+    """One row per LLM call."""
+    __tablename__ = "token_usage_call"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    project: str = Field(index=True)
+    run_id: str = Field(index=True)
+    agent: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    timestamp: str
+
+
+class TokenUsageCounter(SQLModel, table=True):
+    """
+    Running totals per project and run. The row with an empty `run_id` holds the
+    project-wide total so `/api/token-usage` is a single primary-key lookup.
+    """
+    __tablename__ = "token_usage_counter"
+
+    project: str = Field(primary_key=True)
+    run_id: str = Field(default="", primary_key=True)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+# project -> id of the run currently being executed for it
+_current_runs = {}
+_runs_lock = threading.Lock()
+
+
+class TokenUsage:
+    """Ledger of prompt/completion tokens per project, run, agent and model."""
+
+    def __init__(self):
+        self.engine = get_engine()
+
+    def start_run(self, project: str) -> str:
+        """Start a new run for `project`; following calls are counted against it."""
+        run_id = uuid.uuid4().hex
+        with _runs_lock:
+            _current_runs[project] = run_id
+        return run_id
+
+    def get_run_id(self, project: str) -> str:
+        with _runs_lock:
+            if project not in _current_runs:
+                _current_runs[project] = uuid.uuid4().hex
+            return _current_runs[project]
+
+    def _increment(self, session: Session, project: str, run_id: str, prompt_tokens: int, completion_tokens: int):
+        counters = TokenUsageCounter.__table__
+        stmt = insert(counters).values(
+            project=project,
+            run_id=run_id,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens
+        )
+        # Single atomic statement: SET n = n + ? on conflict, no read-modify-write
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[counters.c.project, counters.c.run_id],
+            set_={
+                "prompt_tokens": counters.c.prompt_tokens + stmt.excluded.prompt_tokens,
+                "completion_tokens": counters.c.completion_tokens + stmt.excluded.completion_tokens,
+            }
+        )
+        session.exec(stmt)
+
+    def record(self, project: str, model: str, agent: str, prompt_tokens: int, completion_tokens: int) -> int:
+        """Record one LLM call and return the project's new total token count."""
+        run_id = self.get_run_id(project)
+        with Session(self.engine) as session:
+            session.add(TokenUsageCall(
+                project=project,
+                run_id=run_id,
+                agent=agent or "unknown",
+                model=model or "unknown",
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            ))
+            self._increment(session, project, "", prompt_tokens, completion_tokens)
+            self._increment(session, project, run_id, prompt_tokens, completion_tokens)
+            session.commit()
+        return self.get_total(project)
+
+    def get_counter(self, project: str, run_id: str = "") -> dict:
+        with Session(self.engine) as session:
+            counter = session.get(TokenUsageCounter, (project, run_id))
+            if counter:
+                return {
+                    "prompt_tokens": counter.prompt_tokens,
+                    "completion_tokens": counter.completion_tokens,
+                    "total_tokens": counter.prompt_tokens + counter.completion_tokens
+                }
+            return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+    def get_total(self, project: str) -> int:
+        return self.get_counter(project)["total_tokens"]
+
+    def get_run_total(self, project: str, run_id: str = None) -> int:
+        return self.get_counter(project, run_id or self.get_run_id(project))["total_tokens"]
+
+    def get_agent_report(self, project: str, run_id: str = None) -> list:
+        """Tokens and call count per agent and model, for the whole project or one run."""
+        with Session(self.engine) as session:
+            query = session.query(
+                TokenUsageCall.agent,
+                TokenUsageCall.model,
+                func.count(TokenUsageCall.id),
+                func.sum(TokenUsageCall.prompt_tokens),
+                func.sum(TokenUsageCall.completion_tokens)
+            ).filter(TokenUsageCall.project == project)
+            if run_id:
+                query = query.filter(TokenUsageCall.run_id == run_id)
+            rows = query.group_by(TokenUsageCall.agent, TokenUsageCall.model).all()
+
+        return [
+            {
+                "agent": agent,
+                "model": model,
+                "calls": calls,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+            for agent, model, calls, prompt_tokens, completion_tokens in rows
+        ]
+
+    def delete_project(self, project: str):
+        with Session(self.engine) as session:
+            session.query(TokenUsageCall).filter_by(project=project).delete()
+            session.query(TokenUsageCounter).filter_by(project=project).delete()
+            session.commit()
+        with _runs_lock:
+            _current_runs.pop(project, None)
@@ -4,24 +4,6 @@ import os
 
 
 
-def terminate_process(pid):
-    import signal
-    from src.socket_instance import emit_agent
-    from src.agents.runner.runner import process_dict, is_windows
-    print(process_dict)  # Printing the process dictionary
-    if pid in process_dict:
-        process = process_dict[pid]
-        try:
-            if is_windows:
-                process.terminate()  # Assuming the process object has a terminate method
-            else:
-                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-            emit_agent('kill_process_response', {"status": "success", "message": f"Process {pid} terminated."})
-        except Exception as e:
-            emit_agent('kill_process_response', {"status": "error", "message": str(e)})
-    else:
-        emit_agent('kill_process_response', {"status": "error", "message": f"Process {pid} not found."})
-
 def shorten_path(path):
     """
   This function shortens a path by removing redundant directory structures.
@@ -0,0 +1,20 @@
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# `Config` writes config.toml into the working directory on first use and the
+# module-level loggers open `data/logs`, both at import time. Run the suite from
+# a scratch directory with its own copy of the sample config so the checkout is
+# never touched.
+sys.path.insert(0, ROOT)
+WORKDIR = tempfile.mkdtemp(prefix="atlas-tests-")
+shutil.copy(os.path.join(ROOT, "sample.config.toml"), WORKDIR)
+os.chdir(WORKDIR)
+
+
+def pytest_unconfigure(config):
+    os.chdir(ROOT)
+    shutil.rmtree(WORKDIR, ignore_errors=True)
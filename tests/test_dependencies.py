@@ -0,0 +1,53 @@
+from src.filesystem.dependencies import build_dependency_graph, dependency_levels, extract_imports
+
+DESIGN = [
+    "backend/main.py",
+    "backend/services/users.py",
+    "backend/models/user.py",
+    "backend/config.py",
+    "frontend/src/App.jsx",
+    "frontend/src/api/client.js",
+    "frontend/src/config.js",
+    "frontend/src/styles.css",
+]
+
+
+def test_rank_edges_stay_in_the_subtree():
+    graph = build_dependency_graph(DESIGN)
+    assert graph["backend/config.py"] == set()
+    assert graph["backend/models/user.py"] == {"backend/config.py"}
+    assert graph["backend/services/users.py"] == {"backend/config.py", "backend/models/user.py"}
+    assert graph["backend/main.py"] == {"backend/config.py", "backend/models/user.py", "backend/services/users.py"}
+    assert graph["frontend/src/api/client.js"] == {"frontend/src/config.js"}
+    # Nothing crosses from one app to the other
+    assert graph["frontend/src/App.jsx"] == {"frontend/src/config.js", "frontend/src/api/client.js"}
+
+
+def test_existing_files_depend_on_what_they_import(tmp_path):
+    (tmp_path / "backend" / "services").mkdir(parents=True)
+    (tmp_path / "backend" / "services" / "users.py").write_text("from ..models.user import User\nimport os\n")
+    graph = build_dependency_graph(DESIGN, str(tmp_path))
+    assert graph["backend/services/users.py"] == {"backend/models/user.py"}
+    assert graph["backend/main.py"] == {"backend/config.py", "backend/models/user.py", "backend/services/users.py"}
+
+
+def test_extract_imports():
+    files = ["src/app.py", "src/db/__init__.py", "src/utils.py", "web/index.html", "web/main.js",
+             "web/lib/api.ts", "web/style.css", "web/base.css"]
+    assert extract_imports("src/app.py", "from .db import session\nimport utils\n", files) == \
+        {"src/db/__init__.py", "src/utils.py"}
+    assert extract_imports("web/main.js", "import api from './lib/api'\nimport React from 'react'\n", files) == \
+        {"web/lib/api.ts"}
+    assert extract_imports("web/index.html", '<link href="style.css"><script src="https://x/y.js"></script>'
+                           '<script src="main.js"></script>', files) == {"web/style.css", "web/main.js"}
+    assert extract_imports("web/style.css", "@import './base.css';", files) == {"web/base.css"}
+
+
+def test_dependency_levels():
+    graph = {"main.py": {"app.py", "config.py"}, "app.py": {"config.py"}, "config.py": set(), "util.py": set()}
+    assert dependency_levels(graph) == [["config.py", "util.py"], ["app.py"], ["main.py"]]
+
+
+def test_cycles_end_up_in_the_last_level():
+    graph = {"a.py": {"b.py"}, "b.py": {"a.py"}, "c.py": {"a.py"}, "d.py": set(), "e.py": {"missing.py"}}
+    assert dependency_levels(graph) == [["d.py", "e.py"], ["a.py", "b.py", "c.py"]]
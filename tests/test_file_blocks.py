@@ -0,0 +1,46 @@
+from src.filesystem.file_blocks import FileBlockParser, parse_file_blocks
+
+RESPONSE = """~~~
+File: `README.md`:
+```md
+# T
+
+Install it with:
+
+```bash
+pip install t
+```
+
+Then run `t`.
+```
+
+File: `src/main.py`:
+```py
+print("hello")
+```
+~~~"""
+
+
+def test_nested_fences_stay_in_the_file():
+    files = parse_file_blocks(RESPONSE)
+    assert [file["file"] for file in files] == ["README.md", "src/main.py"]
+    assert files[0]["code"] == "# T\n\nInstall it with:\n\n```bash\npip install t\n```\n\nThen run `t`."
+    assert files[1]["code"] == 'print("hello")'
+
+
+def test_streamed_chunks_give_the_same_files():
+    completed = []
+    parser = FileBlockParser(on_file=completed.append)
+    for start in range(0, len(RESPONSE), 7):
+        parser.feed(RESPONSE[start:start + 7])
+    assert parser.close() == parse_file_blocks(RESPONSE)
+    assert completed == parser.files
+
+
+def test_header_closes_an_unclosed_fence():
+    files = parse_file_blocks("File: `a.py`:\n```python\nx=1\nFile: `b.py`:\n```python\ny=2\n```\n")
+    assert files == [{"file": "a.py", "code": "x=1"}, {"file": "b.py", "code": "y=2"}]
+
+
+def test_header_without_backtick_or_colon_is_invalid():
+    assert parse_file_blocks("File: main.py\n```py\nx = 1\n```") is False
@@ -0,0 +1,79 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.browser.scrape_cache import ScrapeCache
+from src.config import Config
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 21 Oct 2026 07:28:00 GMT"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        PageHandler.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = b"<html><body><p>Hello</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    PageHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_hit_revalidation_and_stale_fallback(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ttl_hours = {"value": 24}
+    monkeypatch.setattr(Config, "get_scrape_cache_enabled", lambda self: True)
+    monkeypatch.setattr(Config, "get_scrape_cache_ttl_hours", lambda self: ttl_hours["value"])
+    monkeypatch.setattr(Config, "get_scrape_cache_max_size_mb", lambda self: 128)
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/page"
+    with httpx.Client(timeout=5) as client:
+        cache = ScrapeCache(client=client, sqlite_path=str(tmp_path / "cache.db"))
+        clean = lambda html: html.replace("<html><body><p>", "").replace("</p></body></html>", "")
+
+        # First fetch downloads and stores the page with its validators
+        assert cache.fetch(url, clean) == "Hello"
+        assert cache.stats()["misses"] == 1
+
+        # Within the TTL the network isn't touched
+        assert cache.fetch(url, clean) == "Hello"
+        assert cache.stats()["hits"] == 1
+        assert len(PageHandler.requests) == 1
+
+        # Past the TTL the page is revalidated and the 304 keeps the stored copy
+        ttl_hours["value"] = 0
+        assert cache.fetch(url, clean) == "Hello"
+        assert cache.stats()["revalidated"] == 1
+        assert PageHandler.requests[-1].get("If-None-Match") == ETAG
+        assert PageHandler.requests[-1].get("If-Modified-Since") == LAST_MODIFIED
+
+        # With the origin gone the stale copy is served
+        server.shutdown()
+        server.server_close()
+        assert cache.fetch(url, clean) == "Hello"
+        assert cache.stats()["stale"] == 1
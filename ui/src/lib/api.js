@@ -122,6 +122,44 @@ export async function fetchAgentState() {
   });
   const data = await response.json();
   agentState.set(data.state);
+  agentStateVersion = data.version || 0;
+}
+
+// Version of the last agent-state delta applied for the selected project
+let agentStateVersion = 0;
+
+function applyAgentStateEntries(entries) {
+  if (entries && entries.length > 0) {
+    const latest = entries.reduce((a, b) => (b.seq >= a.seq ? b : a));
+    agentState.set(latest.state);
+  }
+}
+
+export async function resyncAgentState() {
+  const projectName = localStorage.getItem("selectedProject");
+  const response = await fetch(`${API_BASE_URL}/api/get-agent-state-delta`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ project_name: projectName, since_version: agentStateVersion }),
+  });
+  const data = await response.json();
+  applyAgentStateEntries(data.entries);
+  agentStateVersion = data.version;
+}
+
+export function handleAgentStateDelta(delta) {
+  if (delta.project !== localStorage.getItem("selectedProject")) {
+    return;
+  }
+  if (delta.version === agentStateVersion + 1) {
+    applyAgentStateEntries(delta.entries);
+    agentStateVersion = delta.version;
+  } else if (delta.version > agentStateVersion + 1 || delta.version === 1) {
+    // Missed at least one update (or the state was reset), fetch what changed
+    resyncAgentState();
+  }
 }
 
 export async function executeAgent(prompt) {
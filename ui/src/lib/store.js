@@ -29,12 +29,15 @@ export const agentState = writable(null);
 
 export const internet = writable(true);
 export const tokenUsage = writable(0);
+// Responses being streamed in the selected project, by stream id: { agent, text, tokens }
+export const inferenceStreams = writable({});
 
 
 storeSelectedProject.subscribe((value) => {
   if (typeof window !== 'undefined' && window.localStorage) {
     localStorage.setItem('selectedProject', value);
   }
+  inferenceStreams.set({});
 });
 
 selectedModel.subscribe((value) => {